@@ -0,0 +1,110 @@
+""" Кеш синтезированной речи на диске: повторное воспроизведение того же текста тем же голосом
+    берется из готового файла, а не синтезируется заново """
+
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+
+CACHE_DIR = "tts_cache"  # Папка с кешем
+MAX_BYTES = 100 * 1024 * 1024  # Максимальный размер кеша
+# pyttsx3 в macOS сохраняет AIFF, в остальных системах - WAV
+EXTENSION = ".aiff" if sys.platform == "darwin" else ".wav"
+
+
+# Файл называется хешем (текст, голос, скорость), поэтому одинаковые фразы хранятся один раз.
+# Когда кеш превышает max_bytes, удаляются файлы, которые дольше всего не воспроизводились
+class AudioCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()  # Имя файла -> размер, от давно использованных к недавним
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    # Читаем содержимое папки один раз, порядок использования - по времени изменения файлов
+    def load(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+            elif entry.is_file() and entry.name.endswith(".tmp"):
+                os.remove(entry.path)  # Недописанный файл
+        for mtime, name, size in sorted(entries):
+            self.files[name] = size
+            self.size += size
+
+    @staticmethod
+    def make_key(text, voice, rate):
+        data = "\0".join([str(voice), str(rate), text]).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + EXTENSION)
+
+    # Путь к файлу из кеша или None. Время изменения файла обновляется,
+    # чтобы порядок использования сохранился до следующего запуска
+    def get(self, key):
+        name = key + EXTENSION
+        if name not in self.files:
+            self.misses += 1
+            return None
+        path = self.get_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.remove(name)  # Файл удалили вручную
+            self.misses += 1
+            return None
+        self.files.move_to_end(name)
+        self.hits += 1
+        return path
+
+    # Файл, в который нужно синтезировать речь перед добавлением в кеш
+    def temp_path(self, key):
+        return self.get_path(key) + ".tmp"
+
+    # Добавляем синтезированный файл в кеш. Пустой или отсутствующий файл не добавляется
+    def add(self, key, temp_path):
+        try:
+            size = os.path.getsize(temp_path)
+        except OSError:
+            return None
+        if size == 0:
+            os.remove(temp_path)
+            return None
+
+        name = key + EXTENSION
+        path = self.get_path(key)
+        os.replace(temp_path, path)
+        if name in self.files:
+            self.size -= self.files[name]
+        self.files[name] = size
+        self.files.move_to_end(name)
+        self.size += size
+        self.evict()
+        return path if name in self.files else None
+
+    def remove(self, name):
+        self.size -= self.files.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    # Удаляем давно не использованные файлы, пока кеш не станет меньше max_bytes
+    def evict(self):
+        while self.size > self.max_bytes and self.files:
+            name = next(iter(self.files))
+            self.remove(name)
+            self.evicted += 1
+
+    def get_stats(self):
+        return {"files": len(self.files), "bytes": self.size, "hits": self.hits,
+                "misses": self.misses, "evicted": self.evicted}
@@ -0,0 +1,65 @@
+""" Воспроизведение звуковых файлов из кеша речи. Воспроизведение можно прервать в любой момент """
+
+import shutil
+import subprocess
+import sys
+import time
+import wave
+
+POLL_INTERVAL = 0.05  # Как часто проверяем, не нужно ли прервать воспроизведение
+
+
+# Windows: стандартный модуль winsound. Он не сообщает об окончании воспроизведения,
+# поэтому ждем столько, сколько длится WAV-файл
+class WinsoundPlayer:
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+
+    # Воспроизводим файл и возвращаем True, если он был воспроизведен до конца
+    def play(self, path, should_stop):
+        with wave.open(path, "rb") as f:
+            duration = f.getnframes() / f.getframerate()
+        self.winsound.PlaySound(path, self.winsound.SND_FILENAME | self.winsound.SND_ASYNC)
+
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            if should_stop():
+                self.winsound.PlaySound(None, self.winsound.SND_PURGE)
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+
+# Остальные системы: консольный проигрыватель (afplay в macOS, paplay или aplay в Linux)
+class CommandPlayer:
+    def __init__(self, command):
+        self.command = command
+
+    def play(self, path, should_stop):
+        process = subprocess.Popen(
+            self.command + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        while process.poll() is None:
+            if should_stop():
+                process.terminate()
+                process.wait()
+                return False
+            time.sleep(POLL_INTERVAL)
+        if process.returncode != 0:
+            raise OSError(f"{self.command[0]} завершился с кодом {process.returncode}")
+        return True
+
+
+PLAYER_COMMANDS = [["afplay"], ["paplay"], ["aplay", "-q"]]
+
+
+# Проигрыватель для текущей системы или None, если воспроизводить файлы нечем
+# (тогда текст произносится движком напрямую, без кеша)
+def get_player():
+    if sys.platform == "win32":
+        return WinsoundPlayer()
+    for command in PLAYER_COMMANDS:
+        if shutil.which(command[0]) is not None:
+            return CommandPlayer(command)
+    return None
@@ -0,0 +1,116 @@
+""" Перевод множества фрагментов текста небольшим количеством запросов """
+
+import threading
+from concurrent.futures import as_completed
+
+from Text_chunks import split_text, join_chunks
+
+
+# Несколько фрагментов склеиваются через перевод строки и отправляются одним запросом,
+# а результат разрезается обратно по строкам. Если переводчик изменил количество строк,
+# фрагменты этой пачки переводятся по одному
+class BatchTranslator:
+    separator = "\n"
+
+    def __init__(self, translate_func, max_symbols=3100, executor=None):
+        self.translate_func = translate_func  # translate_func(text, src, dest) -> str
+        self.max_symbols = max_symbols  # Максимальная длина одного запроса
+        self.executor = executor  # Пул потоков для параллельной отправки пачек (необязателен)
+        self.requests = 0  # Сколько запросов было отправлено
+        self.fallbacks = 0  # Сколько пачек пришлось переводить по одному фрагменту
+        self.lock = threading.Lock()
+
+    # Делим фрагменты на пачки, длина каждой не превышает max_symbols
+    def make_batches(self, segments):
+        batches, current, size = [], [], 0
+        for segment in segments:
+            length = len(segment) + len(self.separator)
+            if current and size + length > self.max_symbols:
+                batches.append(current)
+                current, size = [], 0
+            current.append(segment)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    # Переводим одну пачку и возвращаем переводы в том же порядке
+    def translate_batch(self, batch, src, dest):
+        with self.lock:
+            self.requests += 1
+        if len(batch) == 1:
+            return [self.translate_func(batch[0], src, dest)]
+
+        result = self.translate_func(self.separator.join(batch), src, dest)
+        lines = result.split(self.separator)
+
+        # Каждый фрагмент может состоять из нескольких строк
+        sizes = [segment.count(self.separator) + 1 for segment in batch]
+        if len(lines) != sum(sizes):
+            with self.lock:
+                self.fallbacks += 1
+            return [self.translate_batch([segment], src, dest)[0] for segment in batch]
+
+        translations, start = [], 0
+        for size in sizes:
+            translations.append(self.separator.join(lines[start:start + size]))
+            start += size
+        return translations
+
+    # Переводим список фрагментов, возвращаем список переводов того же размера.
+    # on_progress(done, total) вызывается после каждой переведенной пачки
+    def translate(self, segments, src, dest, on_progress=None):
+        # Одинаковые и пустые фрагменты не отправляем повторно
+        unique = list(dict.fromkeys(segment for segment in segments if segment.strip()))
+        batches = self.make_batches(unique)
+
+        translated = {}
+        if self.executor is not None and len(batches) > 1:
+            futures = {self.executor.submit(self.translate_batch, batch, src, dest): batch for batch in batches}
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    translated.update(zip(futures[future], future.result()))
+                    if on_progress is not None:
+                        on_progress(done, len(batches))
+            except Exception:
+                for future in futures:
+                    future.cancel()  # Пачки, которые еще не начали переводиться
+                raise
+        else:
+            for done, batch in enumerate(batches, 1):
+                translated.update(zip(batch, self.translate_batch(batch, src, dest)))
+                if on_progress is not None:
+                    on_progress(done, len(batches))
+
+        return [translated.get(segment, segment) for segment in segments]
+
+    # Переводим блок строк файла: каждая строка делится на части не длиннее max_symbols,
+    # переводы возвращаются с исходными символами перевода строки.
+    # lookup(фрагмент) -> уже известный перевод или None, такие фрагменты не отправляются.
+    # Возвращаем (переведенные строки, {фрагмент: перевод} для отправленных фрагментов)
+    def translate_lines(self, lines, src, dest, lookup=None, on_progress=None):
+        bodies = [line.rstrip("\r\n") for line in lines]
+        line_chunks = [split_text(body, self.max_symbols) for body in bodies]
+        segments = list(dict.fromkeys(
+            chunk.text for chunks in line_chunks for chunk in chunks if chunk.text
+        ))
+
+        translated = {}
+        if lookup is not None:
+            for segment in segments:
+                output = lookup(segment)
+                if output is not None:
+                    translated[segment] = output
+
+        missing = [segment for segment in segments if segment not in translated]
+        new = {}
+        if missing:
+            new = dict(zip(missing, self.translate(missing, src, dest, on_progress)))
+            translated.update(new)
+
+        result = [
+            join_chunks(chunks, [translated.get(chunk.text, chunk.text) for chunk in chunks])
+            + line[len(body):]
+            for line, body, chunks in zip(lines, bodies, line_chunks)
+        ]
+        return result, new
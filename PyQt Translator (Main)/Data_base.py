@@ -0,0 +1,248 @@
+""" Подключение к БД с историей переводов и обновление ее структуры """
+
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DB_NAME = "Translator.db"  # Название БД с историей всех переводов по умолчанию
+BUSY_TIMEOUT = 5000  # Сколько мс ждать, если БД заблокирована другим процессом
+
+# Настройки соединения
+PRAGMAS = {
+    "busy_timeout": BUSY_TIMEOUT,
+    "journal_mode": "WAL",  # Читатели не блокируют писателя и наоборот
+    "synchronous": "NORMAL",  # В режиме WAL это безопасно и намного быстрее FULL
+    "cache_size": -16000,  # 16 МБ кеша страниц
+    "mmap_size": 64 * 1024 * 1024,  # Чтение через отображение файла в память
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",  # Записи журнала истории удаляются вместе с переводом
+}
+
+
+# Открываем соединение с БД.
+# isolation_level="IMMEDIATE": транзакция записи сразу захватывает блокировку, поэтому два процесса
+# не могут одновременно начать запись и получить "database is locked" при ее повышении
+def connect(db_name=DB_NAME, check_same_thread=True):
+    con = sqlite3.connect(
+        db_name,
+        timeout=BUSY_TIMEOUT / 1000,
+        isolation_level="IMMEDIATE",
+        check_same_thread=check_same_thread,
+    )
+    for name, value in PRAGMAS.items():
+        set_pragma(con, name, value)
+    return con
+
+
+# Переход в режим WAL требует монопольной блокировки, и ее SQLite не ждет по busy_timeout,
+# а сразу отвечает "database is locked" (например, когда несколько процессов одновременно
+# открывают новую БД). Поэтому повторяем настройку, пока не пройдет BUSY_TIMEOUT
+def set_pragma(con, name, value):
+    deadline = time.monotonic() + BUSY_TIMEOUT / 1000
+    while True:
+        try:
+            con.execute(f"PRAGMA {name} = {value}")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+
+
+SCHEMA_VERSION = 2  # Текущая версия структуры БД (хранится в PRAGMA user_version)
+
+# Таблица переводов: одна строка на каждый уникальный перевод, id строки не меняется.
+# Повторный перевод обновляет строку через INSERT ... ON CONFLICT DO UPDATE
+TRANSLATIONS_TABLE = """CREATE TABLE translations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    text TEXT NOT NULL,
+    input_lang STRING (1, 3) NOT NULL,
+    output_lang STRING (1, 3) NOT NULL,
+    saved BOOLEAN NOT NULL DEFAULT (0),
+    output TEXT,
+    UNIQUE (text, input_lang, output_lang)
+)"""
+
+# Журнал истории: при каждом переводе добавляется запись, порядок истории задается ее id
+HISTORY_TABLE = """CREATE TABLE history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    translation_id INTEGER NOT NULL REFERENCES translations (id) ON DELETE CASCADE,
+    created_at TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+)"""
+
+HISTORY_INDEX = "CREATE INDEX history_translation ON history (translation_id)"
+
+
+# Структура БД уже текущей версии
+def is_up_to_date(cur):
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    has_fts = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'translations_fts'"
+    ).fetchone()
+    return version >= SCHEMA_VERSION and has_fts is not None
+
+
+# Создаем таблицы, если БД новая, и приводим старые версии БД к текущей схеме.
+# Несколько процессов могут запуститься одновременно, поэтому структура проверяется заново
+# внутри транзакции записи: второй процесс дождется первого и увидит, что обновлять уже нечего
+def migrate(con):
+    cur = con.cursor()
+    if is_up_to_date(cur):
+        return
+
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        version = cur.execute("PRAGMA user_version").fetchone()[0]
+        exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'translations'"
+        ).fetchone()
+
+        if not exists:
+            for query in [TRANSLATIONS_TABLE, HISTORY_TABLE, HISTORY_INDEX]:
+                cur.execute(query)
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version < SCHEMA_VERSION:
+            migrate_to_upsert(cur)
+
+        create_fts(cur)
+        con.commit()
+    except sqlite3.Error:
+        con.rollback()
+        raise
+
+
+# Старая схема: UNIQUE ... ON CONFLICT REPLACE (повторный перевод удалял строку и добавлял ее
+# с новым id, по id же сортировалась история), колонки output могло не быть.
+# Переносим строки в новую таблицу, а порядок истории - в журнал history
+# (вызывается внутри транзакции migrate)
+def migrate_to_upsert(cur):
+    columns = [row[1] for row in cur.execute("PRAGMA table_info(translations)")]
+    output = "output" if "output" in columns else "NULL"
+    queries = [
+        "DROP TRIGGER IF EXISTS translations_fts_insert",
+        "DROP TRIGGER IF EXISTS translations_fts_delete",
+        "DROP TRIGGER IF EXISTS translations_fts_update",
+        "DROP TABLE IF EXISTS translations_fts",
+
+        "ALTER TABLE translations RENAME TO translations_old",
+        TRANSLATIONS_TABLE,
+        HISTORY_TABLE,
+        HISTORY_INDEX,
+
+        f"""INSERT INTO translations (id, text, input_lang, output_lang, saved, output)
+            SELECT id, text, input_lang, output_lang, saved, {output}
+            FROM translations_old
+            ORDER BY id""",
+
+        """INSERT INTO history (translation_id)
+           SELECT id FROM translations ORDER BY id""",
+
+        "DROP TABLE translations_old",
+        f"PRAGMA user_version = {SCHEMA_VERSION}",
+    ]
+    for query in queries:
+        cur.execute(query)
+
+
+# Новый перевод добавляется в полнотекстовый индекс
+FTS_INSERT_TRIGGER = """CREATE TRIGGER translations_fts_insert AFTER INSERT ON translations BEGIN
+    INSERT INTO translations_fts(rowid, text, output)
+    VALUES (new.id, new.text, new.output);
+END"""
+
+FTS_QUERIES = [
+    """CREATE VIRTUAL TABLE translations_fts USING fts5(
+        text, output, content='translations', content_rowid='id'
+    )""",
+
+    FTS_INSERT_TRIGGER,
+
+    """CREATE TRIGGER translations_fts_delete AFTER DELETE ON translations BEGIN
+        INSERT INTO translations_fts(translations_fts, rowid, text, output)
+        VALUES ('delete', old.id, old.text, old.output);
+    END""",
+
+    """CREATE TRIGGER translations_fts_update AFTER UPDATE OF text, output ON translations BEGIN
+        INSERT INTO translations_fts(translations_fts, rowid, text, output)
+        VALUES ('delete', old.id, old.text, old.output);
+        INSERT INTO translations_fts(rowid, text, output)
+        VALUES (new.id, new.text, new.output);
+    END""",
+
+    "INSERT INTO translations_fts(translations_fts) VALUES ('rebuild')",
+]
+
+
+# Полнотекстовый индекс для поиска по истории, синхронизируется триггерами
+# (вызывается внутри транзакции migrate)
+def create_fts(cur):
+    has_fts = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'translations_fts'"
+    ).fetchone()
+    if has_fts:
+        return
+
+    cur.execute("SAVEPOINT fts")
+    try:
+        for query in FTS_QUERIES:
+            cur.execute(query)
+    except sqlite3.OperationalError as e:
+        # SQLite собран без FTS5: поиск будет работать через LIKE
+        cur.execute("ROLLBACK TO fts")
+        print(e, "<---- FTS5 недоступен")
+    cur.execute("RELEASE fts")
+
+
+# Массовая вставка переводов (вызывается после явного BEGIN): на время вставки триггер
+# полнотекстового индекса удаляется, а новые строки добавляются в индекс одним запросом.
+# Так в несколько раз быстрее, чем по одной строке из триггера. Другие соединения не могут
+# писать в БД, пока идет транзакция, поэтому их вставки без триггера не останутся
+@contextmanager
+def bulk_insert(cur):
+    has_trigger = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'translations_fts_insert'"
+    ).fetchone()
+    if not has_trigger:
+        yield
+        return
+
+    # id с AUTOINCREMENT только растут, поэтому новые строки - это строки с id больше last_id
+    last_id = cur.execute("SELECT COALESCE(MAX(id), 0) FROM translations").fetchone()[0]
+    cur.execute("DROP TRIGGER translations_fts_insert")
+    yield
+    cur.execute("""INSERT INTO translations_fts(rowid, text, output)
+                   SELECT id, text, output FROM translations WHERE id > ?""", [last_id])
+    cur.execute(FTS_INSERT_TRIGGER)
+
+
+# Сохраненный в БД перевод data = [text, input_lang, output_lang] (или None, если его нет или он пустой)
+def get_translation(cur, data):
+    query = """SELECT output FROM translations
+               WHERE text=? AND input_lang=? AND output_lang=? AND output IS NOT NULL AND output != ''"""
+    result = cur.execute(query, list(data)).fetchone()
+    if result is not None:
+        return result[0]
+    return None
+
+
+# Сохраняем перевод одним запросом: если такой перевод уже есть в БД,
+# то у него обновится только перевод (id и saved не меняются).
+# Если history=True, то вторым запросом добавляем запись в журнал истории
+# и возвращаем (id записи, id предыдущей записи этого перевода или None)
+def save_translation(cur, data, output, history=True):
+    upsert_query = """INSERT INTO translations(text, input_lang, output_lang, output)
+                      VALUES(?, ?, ?, ?)
+                      ON CONFLICT(text, input_lang, output_lang)
+                      DO UPDATE SET output = excluded.output
+                      RETURNING id"""
+    translation_id = cur.execute(upsert_query, list(data) + [output]).fetchall()[0][0]
+    if not history:
+        return None
+
+    history_query = """INSERT INTO history(translation_id)
+                       SELECT ?
+                       RETURNING id, (SELECT MAX(previous.id) FROM history AS previous
+                                      WHERE previous.translation_id = history.translation_id
+                                      AND previous.id < history.id)"""
+    event_id, previous_id = cur.execute(history_query, [translation_id]).fetchall()[0]
+    return event_id, previous_id
@@ -0,0 +1,162 @@
+""" Запись в БД в отдельном потоке: записи объединяются в транзакции, чтобы не ждать диск на каждое действие """
+
+import queue
+import sqlite3
+import threading
+import time
+
+import Data_base
+
+STOP = object()  # Завершить поток после записи всего, что уже в очереди
+FLUSH = object()  # Записать все, что уже в очереди, не дожидаясь окончания окна
+
+
+# Единственный поток, который пишет в БД. Задания берутся из очереди и выполняются пачкой
+# в одной транзакции: пачка собирается в течение window секунд или до max_batch заданий.
+# on_error(текст ошибки) вызывается в потоке записи для каждого задания, которое не удалось записать
+class DbWriter(threading.Thread):
+    def __init__(self, db_name=Data_base.DB_NAME, window=0.05, max_batch=500, on_error=None):
+        super().__init__(daemon=True)
+        self.db_name = db_name
+        self.window = window
+        self.max_batch = max_batch
+        self.on_error = on_error
+        self.queue = queue.Queue()
+
+        self.writes = 0  # Сколько заданий выполнено
+        self.commits = 0  # Сколько транзакций записано
+        self.errors = 0
+
+        self.start()
+
+    # Добавляем задание: func(cursor) выполняется в потоке записи,
+    # после фиксации транзакции вызывается on_done(результат func) (тоже в потоке записи)
+    def submit(self, func, on_done=None):
+        self.queue.put((func, on_done))
+
+    # Задание из одного SQL-запроса, результат - id добавленной строки
+    def execute(self, query, params=(), on_done=None):
+        self.submit(lambda cur: cur.execute(query, params).lastrowid, on_done)
+
+    def executemany(self, query, params, on_done=None):
+        self.submit(lambda cur: cur.executemany(query, params).rowcount, on_done)
+
+    # Ждем, пока все уже добавленные задания будут записаны
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.queue.put((FLUSH, lambda result: done.set()))
+        return done.wait(timeout)
+
+    # Записываем все задания и завершаем поток
+    def close(self, timeout=None):
+        if self.is_alive():
+            self.queue.put((STOP, None))
+            self.join(timeout)
+
+    def get_stats(self):
+        return {"writes": self.writes, "commits": self.commits, "errors": self.errors}
+
+    # Собираем пачку заданий: первое ждем сколько угодно, остальные - до конца окна
+    def collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch and batch[-1][0] not in (STOP, FLUSH):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        con = Data_base.connect(self.db_name)
+        cur = con.cursor()
+        stop = False
+
+        while not stop:
+            batch = self.collect()
+            try:
+                results, stop = self.write_batch(con, cur, batch)
+            except sqlite3.Error as e:
+                # Например, БД слишком долго заблокирована другим процессом:
+                # повторяем задания пачки по одному, каждое в своей транзакции
+                if con.in_transaction:
+                    con.rollback()
+                print(e, "<---- Ошибка записи пачки в БД, повторяем по одному заданию")
+                results, stop = self.write_jobs(con, cur, batch)
+
+            for on_done, result in results:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    print(e, "<---- Ошибка записи в БД")
+
+        con.close()
+
+    # Сообщаем о задании, которое не удалось записать
+    def report_error(self, e):
+        self.errors += 1
+        print(e, "<---- Ошибка записи в БД")
+        if self.on_error is not None:
+            try:
+                self.on_error(str(e))
+            except Exception as callback_error:
+                print(callback_error, "<---- Ошибка записи в БД")
+
+    # Выполняем задания по одному: ошибка одного задания не отменяет остальные.
+    # Если БД заблокирована другим процессом, остальные задания не ждут блокировку заново
+    def write_jobs(self, con, cur, batch):
+        results = []
+        stop = False
+        locked = None
+        for func, on_done in batch:
+            if func is STOP:
+                stop = True
+            elif func is FLUSH:
+                results.append((on_done, None))
+            elif locked is not None:
+                self.report_error(locked)
+            else:
+                try:
+                    results.extend(self.write_batch(con, cur, [(func, on_done)])[0])
+                except sqlite3.Error as e:
+                    if con.in_transaction:
+                        con.rollback()
+                    self.report_error(e)
+                    if "locked" in str(e):
+                        locked = e
+        return results, stop
+
+    # Выполняем пачку заданий в одной транзакции
+    def write_batch(self, con, cur, batch):
+        results = []
+        stop = False
+        written = 0
+
+        cur.execute("BEGIN IMMEDIATE")
+        for func, on_done in batch:
+            if func is STOP:
+                stop = True
+                continue
+            if func is FLUSH:
+                results.append((on_done, None))
+                continue
+
+            # Ошибка одного задания не должна отменять остальные задания транзакции
+            cur.execute("SAVEPOINT task")
+            try:
+                result = func(cur)
+            except Exception as e:
+                cur.execute("ROLLBACK TO task")
+                self.report_error(e)
+                on_done = None
+            cur.execute("RELEASE task")
+            written += 1
+            if on_done is not None:
+                results.append((on_done, result))
+        con.commit()
+        self.commits += 1
+        self.writes += written
+        return results, stop
@@ -0,0 +1,132 @@
+""" Локальный сервер перевода для нагрузочных тестов и работы без сети.
+    API как у LibreTranslate (POST /translate), задержку и долю ошибок можно настроить.
+
+    python Fake_translate_server.py --port 5000 --latency 0.2 --error-rate 0.1
+    python Translate_cli.py text.txt -s ru -d en --backend http --url http://127.0.0.1:5000 """
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import Data_base
+from Translate_backends import MemoryBackend
+
+
+# Перевод-заглушка: к каждой непустой строке добавляется код языка перевода.
+# Количество строк сохраняется, поэтому перевод пачками работает как с настоящим сервисом
+def fake_translate(text, in_lang, out_lang):
+    return "\n".join(f"[{out_lang}] {line}" if line.strip() else line for line in text.split("\n"))
+
+
+class FakeTranslateServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 translate=fake_translate, seed=None):
+        self.latency = latency  # Задержка каждого ответа в секундах
+        self.jitter = jitter  # Случайная добавка к задержке (от 0 до jitter секунд)
+        self.error_rate = error_rate  # Доля запросов, на которые сервер отвечает ошибкой 503
+        self.translate = translate  # translate(text, in_lang, out_lang) -> str
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.lock = threading.Lock()  # Защищает random и stats
+        self.thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Не выводим каждый запрос
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def send(self, handler, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        handler.send_response(code)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler):
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.random.random() < self.error_rate
+        time.sleep(delay)
+
+        if handler.path != "/translate":
+            self.send(handler, 404, {"error": "Not found"})
+            return
+        if failed:
+            with self.lock:
+                self.stats["errors"] += 1
+            self.send(handler, 503, {"error": "Service unavailable"})
+            return
+        try:
+            length = int(handler.headers.get("Content-Length", 0))
+            data = json.loads(handler.rfile.read(length).decode("utf-8"))
+            output = self.translate(data["q"], data["source"], data["target"])
+        except (ValueError, KeyError) as e:
+            self.send(handler, 400, {"error": str(e)})
+            return
+        with self.lock:
+            self.stats["translated"] += 1
+            self.stats["symbols"] += len(data["q"])
+        self.send(handler, 200, {"translatedText": output})
+
+    # Запускаем сервер в фоновом потоке (для тестов в том же процессе)
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервер перевода для тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа в секундах")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой (0..1)")
+    parser.add_argument("--seed", type=int, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--memory", action="store_true", help="переводить по памяти переводов из БД")
+    parser.add_argument("--db", default=Data_base.DB_NAME, help="БД с переводами (для --memory)")
+    args = parser.parse_args(argv)
+
+    translate = MemoryBackend(args.db).translate if args.memory else fake_translate
+    server = FakeTranslateServer(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                                 translate, args.seed)
+    print("Сервер перевода:", server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+""" Потоковое чтение и запись текстовых файлов: большие файлы не загружаются в память целиком """
+
+import codecs
+import mmap
+import os
+
+CHUNK_SIZE = 1024 * 1024  # Сколько байт декодируем за раз
+SAMPLE_SIZE = 64 * 1024  # По скольким байтам определяем кодировку
+FALLBACK_ENCODING = "cp1251"  # Кодировка старых русских текстов в Windows
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+# Определяем кодировку по BOM или по началу файла: если оно читается как UTF-8, то UTF-8
+def detect_encoding(path):
+    with open(path, "rb") as f:
+        sample = f.read(SAMPLE_SIZE)
+
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # final=False: последний символ мог быть обрезан на границе образца
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+# Читаем файл кусками по chunk_size байт через отображение в память (mmap)
+def read_text(path, encoding=None, chunk_size=CHUNK_SIZE):
+    if encoding is None:
+        encoding = detect_encoding(path)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # Пустой файл нельзя отобразить в память
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start in range(0, len(data), chunk_size):
+                text = decoder.decode(data[start:start + chunk_size])
+                if text:
+                    yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+# Делим поток кусков текста на строки (вместе с символами перевода строки)
+def iter_lines(chunks):
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + chunk).splitlines(keepends=True)
+        # Последняя строка может продолжиться в следующем куске
+        rest = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    if rest:
+        yield rest
+
+
+# Собираем строки в блоки примерно по block_size символов
+def iter_blocks(lines, block_size):
+    block, size = [], 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield block
+            block, size = [], 0
+    if block:
+        yield block
+
+
+# Записываем текст в файл по мере поступления кусков
+def write_text(path, pieces, encoding="utf-8"):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        for piece in pieces:
+            f.write(piece)
+
+
+# Имя файла с переводом: рядом с исходным файлом (или в output_dir) с кодом языка перед расширением
+def get_output_path(path, out_lang, output_dir=None):
+    name, ext = os.path.splitext(os.path.basename(path))
+    directory = output_dir if output_dir is not None else os.path.dirname(path)
+    return os.path.join(directory, f"{name}.{out_lang}{ext or '.txt'}")
@@ -0,0 +1,184 @@
+""" Нечеткий поиск по памяти переводов: находит прошлые переводы похожих текстов
+    (например, того же предложения с одним измененным словом) по общим триграммам символов """
+
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+
+import Data_base
+
+N = 3  # Длина n-граммы
+MAX_LENGTH = 1000  # Более длинные тексты не индексируются
+MIN_SIMILARITY = 0.7  # Тексты с меньшим сходством не считаются похожими
+SPACES = re.compile(r"\s+")
+
+
+# Множество триграмм текста (без учета регистра и лишних пробелов)
+def make_ngrams(text):
+    text = " " + SPACES.sub(" ", text.lower()).strip() + " "
+    return {text[i:i + N] for i in range(max(1, len(text) - N + 1))}
+
+
+# Коэффициент Дайса: 2 * общие триграммы / (триграммы первого + триграммы второго текста)
+def similarity(a, b):
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+# Индекс одной пары языков: для каждой триграммы - номера текстов, в которых она встречается
+class NgramIndex:
+    def __init__(self):
+        self.texts = []
+        self.outputs = []
+        self.sizes = array("I")  # Количество триграмм каждого текста
+        self.ids = {}  # Текст -> номер
+        self.postings = {}  # Триграмма -> array номеров текстов
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text, output):
+        if not text.strip() or len(text) > MAX_LENGTH or output is None:
+            return
+        if text in self.ids:
+            self.outputs[self.ids[text]] = output  # Перевод обновился, триграммы те же
+            return
+
+        i = len(self.texts)
+        ngrams = make_ngrams(text)
+        self.ids[text] = i
+        self.texts.append(text)
+        self.outputs.append(output)
+        self.sizes.append(len(ngrams))
+        for ngram in ngrams:
+            if ngram not in self.postings:
+                self.postings[ngram] = array("I")
+            self.postings[ngram].append(i)
+
+    # Похожие тексты: [(сходство, текст, перевод), ...] от самого похожего, не больше limit.
+    # Похожий текст обязательно содержит хотя бы одну из самых редких триграмм запроса
+    # (их количество зависит от min_similarity), поэтому кандидаты берутся только из их списков.
+    # Количество общих триграмм считается по спискам всех триграмм запроса, сами тексты не сравниваются
+    def search(self, text, min_similarity=MIN_SIMILARITY, limit=5):
+        ngrams = make_ngrams(text)
+        size = len(ngrams)
+        # При сходстве >= t у текстов не меньше t * size / (2 - t) общих триграмм,
+        # а количество триграмм второго текста лежит в [size * t / (2 - t), size * (2 - t) / t]
+        min_common = max(1, math.ceil(min_similarity * size / (2 - min_similarity) - 1e-9))
+        min_size = size * min_similarity / (2 - min_similarity)
+        max_size = size * (2 - min_similarity) / min_similarity
+
+        rare = sorted(ngrams, key=lambda ngram: len(self.postings.get(ngram, ())))
+        prefix = size - min_common + 1
+        candidates = Counter()
+        for ngram in rare[:prefix]:
+            candidates.update(self.postings.get(ngram, ()))
+        common = Counter()
+        for ngram in rare[prefix:]:
+            common.update(self.postings.get(ngram, ()))
+
+        results = []
+        for i, count in candidates.items():
+            count += common[i]
+            if count < min_common or not min_size <= self.sizes[i] <= max_size:
+                continue
+            score = 2 * count / (size + self.sizes[i])
+            if score >= min_similarity:
+                results.append((score, self.texts[i], self.outputs[i]))
+        results.sort(key=lambda result: -result[0])
+        return results[:limit]
+
+
+# Индексы всех пар языков. Индекс пары строится из БД при первом обращении (можно в фоне),
+# новые переводы добавляются в него сразу после перевода
+class FuzzyMemory:
+    def __init__(self, db_name=Data_base.DB_NAME):
+        self.db_name = db_name
+        self.indexes = {}  # (in_lang, out_lang) -> NgramIndex
+        self.loading = {}  # (in_lang, out_lang) -> переводы, добавленные во время построения индекса
+        # Увеличивается при очистке: индекс, который начал строиться до нее, уже устарел
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.loaded = threading.Condition(self.lock)
+
+    def build(self, in_lang, out_lang):
+        index = NgramIndex()
+        con = Data_base.connect(self.db_name)
+        try:
+            query = """SELECT text, output FROM translations
+                       WHERE input_lang = ? AND output_lang = ? AND output IS NOT NULL
+                       AND length(text) <= ?"""
+            for text, output in con.execute(query, (in_lang, out_lang, MAX_LENGTH)):
+                index.add(text, output)
+        finally:
+            con.close()
+        return index
+
+    # Индекс пары языков. Если wait=False и индекс еще не построен, то он строится в фоне,
+    # а сейчас возвращается None
+    def get_index(self, in_lang, out_lang, wait=True):
+        pair = (in_lang, out_lang)
+        with self.lock:
+            # Индекс уже строится: ждем его. Если память очистили, то начинаем строить заново
+            while pair not in self.indexes and pair in self.loading:
+                if not wait:
+                    return None
+                self.loaded.wait()
+            if pair in self.indexes:
+                return self.indexes[pair]
+            self.loading[pair] = []
+            generation = self.generation
+
+        if not wait:
+            threading.Thread(target=self.load, args=(in_lang, out_lang, generation), daemon=True).start()
+            return None
+        return self.load(in_lang, out_lang, generation)
+
+    # Строим индекс пары языков. Если за это время память очистили (generation изменилось),
+    # то индекс не сохраняется: он построен по старым переводам
+    def load(self, in_lang, out_lang, generation):
+        pair = (in_lang, out_lang)
+        try:
+            index = self.build(in_lang, out_lang)
+        except Exception as e:
+            print(e, "<---- Ошибка построения индекса памяти переводов")
+            index = NgramIndex()
+        with self.lock:
+            if generation != self.generation:
+                return index
+            for text, output in self.loading.pop(pair):
+                index.add(text, output)
+            self.indexes[pair] = index
+            self.loaded.notify_all()
+        return index
+
+    # Добавляем новый перевод (в индекс, если он уже построен или строится)
+    def add(self, data, output):
+        text, in_lang, out_lang = data
+        with self.lock:
+            if (in_lang, out_lang) in self.indexes:
+                self.indexes[in_lang, out_lang].add(text, output)
+            elif (in_lang, out_lang) in self.loading:
+                self.loading[in_lang, out_lang].append((text, output))
+
+    # Похожие прошлые переводы: [(сходство, текст, перевод), ...].
+    # Если wait=False, а индекс пары еще строится, то возвращается пустой список
+    def search(self, data, min_similarity=MIN_SIMILARITY, limit=5, wait=True):
+        text, in_lang, out_lang = data
+        if not text.strip() or len(text) > MAX_LENGTH:
+            return []
+        index = self.get_index(in_lang, out_lang, wait)
+        if index is None:
+            return []
+        with self.lock:
+            return index.search(text, min_similarity, limit)
+
+    # Переводы изменились целиком (импорт, очистка истории): индексы построятся заново.
+    # Тем, кто ждет недостроенный индекс, он тоже строится заново
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.indexes.clear()
+            self.loading.clear()
+            self.loaded.notify_all()
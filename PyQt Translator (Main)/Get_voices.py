@@ -1,27 +1,149 @@
-""" Получаем все возможные голоса, установленные в системе """
+""" Получаем все возможные голоса, установленные в системе.
+    В Windows голоса читаются из реестра, в остальных системах - через pyttsx3 (espeak, nsss).
+    Результат сохраняется на диск и перечитывается только если голоса в системе изменились """
 
-from winreg import * # Модуль для работы с реестром
+import json
+import os
+import re
+import sys
+import time
+
+CACHE_FILE = "voices_cache.json"  # Файл с найденными голосами
+CACHE_VERSION = 1  # Меняется при изменении формата файла
+MAX_AGE = 7 * 24 * 3600  # Через сколько секунд голоса перечитываются в любом случае
+
+VOICES_KEY = r"SOFTWARE\Microsoft\Speech\Voices\Tokens"
+
+# Папки, в которых синтезаторы хранят голоса: если голос установлен или удален,
+# то меняется время изменения папки
+VOICE_DIRS = [
+    "/usr/share/espeak-ng-data/voices",
+    "/usr/lib/x86_64-linux-gnu/espeak-ng-data/voices",
+    "/usr/share/espeak-data/voices",
+    "/System/Library/Speech/Voices",
+    "/Library/Speech/Voices",
+]
+
+# Код языка в начале строки ("en-US", "\x05en-us") и код языка внутри id голоса ("TTS_MS_EN-US_ZIRA_11.0")
+LANG = re.compile(r"^[^a-z]*([a-z]{2,3})(?:[-_]([a-z]{2,4}))?(?![a-z])", re.IGNORECASE)
+ID_LANG = re.compile(r"(?:^|[/\\_.])([a-z]{2,3})-([a-z]{2})(?=$|[/\\_.])", re.IGNORECASE)
+
+
+# Код языка голоса ("en-US", b"\x05en-us", "zh_CN") в формате приложения ("en", "zh-cn")
+def lang_code(lang, pattern=LANG):
+    if isinstance(lang, bytes):
+        lang = lang.decode("utf-8", "ignore")  # espeak: первый байт - приоритет голоса
+    match = pattern.search(lang)
+    if match is None:
+        return None
+    code, region = match.group(1).lower(), (match.group(2) or "").lower()
+    if code == "zh":
+        return "zh-tw" if region in ("tw", "hk", "hant") else "zh-cn"
+    return code
+
+
+# ---------------------------------- Реестр Windows ----------------------------------
+
+# Голоса SAPI из реестра: {язык: путь к голосу в реестре}
+def registry_voices():
+    import winreg  # Модуль для работы с реестром (есть только в Windows)
+
+    voices = {}
+    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, VOICES_KEY) as key:
+        for index in range(winreg.QueryInfoKey(key)[0]):
+            voice = winreg.EnumKey(key, index)
+            # Например, TTS_MS_EN-US_ZIRA_11.0
+            parts = voice.split("_")
+            lang = lang_code(parts[2]) if len(parts) > 2 else None
+            if lang is not None and lang not in voices:
+                voices[lang] = rf"HKEY_LOCAL_MACHINE\{VOICES_KEY}\{voice}"
+    return voices
+
+
+# Время последнего изменения раздела реестра с голосами
+def registry_stamp():
+    import winreg
+
+    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, VOICES_KEY) as key:
+        return winreg.QueryInfoKey(key)[2]
+
+
+# -------------------------------------- pyttsx3 --------------------------------------
+
+# Голоса синтезатора pyttsx3: {язык: id голоса}
+def pyttsx3_voices(engine=None):
+    if engine is None:
+        import pyttsx3  # Библиотека для произношения текста
+        engine = pyttsx3.init()
+
+    voices = {}
+    for voice in engine.getProperty("voices"):
+        # Язык берем из списка языков голоса, а если его нет - из id голоса
+        langs = [lang_code(lang) for lang in getattr(voice, "languages", None) or []]
+        langs.append(lang_code(voice.id, ID_LANG))
+        lang = next((lang for lang in langs if lang is not None), None)
+        if lang is not None:
+            voices.setdefault(lang, voice.id)
+    return voices
+
+
+# Время последнего изменения папок с голосами
+def pyttsx3_stamp():
+    return max((os.path.getmtime(path) for path in VOICE_DIRS if os.path.isdir(path)), default=0)
+
+
+# ---------------------------------------- Кеш ----------------------------------------
+
+# Способ получения голосов для текущей системы: (название, функция поиска, функция отметки изменений)
+def get_backend():
+    if sys.platform == "win32":
+        return "winreg", registry_voices, registry_stamp
+    return "pyttsx3", pyttsx3_voices, pyttsx3_stamp
+
+
+def load_cache(cache_file):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Записываем во временный файл и заменяем им старый, чтобы файл не остался недописанным
+def save_cache(cache_file, cache):
+    try:
+        with open(cache_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(cache_file + ".tmp", cache_file)
+    except OSError as e:
+        print(e, "<---- Не удалось сохранить голоса")
 
 
 class Voices:
+    # Словарь {язык: id голоса}. Голоса берутся из кеша, если с момента его записи
+    # не изменились система, способ поиска голосов и папки (раздел реестра) с голосами
     @staticmethod
-    def get_voices():
-        m = OpenKey(HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Speech\Voices\Tokens")
-        VOICES = {}
+    def get_voices(cache_file=CACHE_FILE, engine=None):
+        backend, find_voices, get_stamp = get_backend()
+        try:
+            stamp = get_stamp()
+        except OSError:
+            stamp = None
+        key = {"version": CACHE_VERSION, "platform": sys.platform, "backend": backend, "stamp": stamp}
+
+        cache = load_cache(cache_file)
+        if (cache is not None and cache.get("key") == key
+                and time.time() - cache.get("created", 0) < MAX_AGE):
+            return cache["voices"]
 
         try:
-            count = 0
-            while 1:
-                voice = EnumKey(m, count)
-                current_lang = voice.split("_")[2]
-                lang = current_lang.split("-")[0].lower()
-                if lang not in VOICES:
-                    VOICES[lang] = (
-                        r"HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Speech\Voices\Tokens"
-                        + f"\\{voice}"
-                    )
-                count += 1
-
-        except WindowsError as err:
-            return VOICES
-            pass
+            if backend == "pyttsx3":
+                voices = find_voices(engine)
+            else:
+                voices = find_voices()
+        except (ImportError, OSError, RuntimeError) as e:
+            print(e, "<---- Не удалось получить голоса")
+            return {}
+
+        save_cache(cache_file, {"key": key, "created": time.time(), "voices": voices})
+        return voices
@@ -0,0 +1,200 @@
+""" Модель для таблиц истории и "сохраненных" переводов, строки подгружаются из БД по мере прокрутки """
+
+from bisect import bisect_left
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class TranslationsModel(QAbstractTableModel):
+    preview_length = 200  # Сколько символов текста показывать в таблице
+
+    def __init__(self, con, saved_only=False, page_size=200, parent=None):
+        super().__init__(parent)
+        self.cur = con.cursor()
+        self.saved_only = saved_only  # Показывать только "сохраненные" переводы
+        self.page_size = page_size  # Сколько строк загружать за раз
+        self.rows = []  # Загруженные строки: [id, начало текста, input_lang, output_lang]
+        self.ids = []  # id загруженных строк по возрастанию (для быстрого поиска строки)
+        self.total = 0  # Сколько всего строк в БД
+        self.search = ""  # Текущий поисковый запрос
+
+        # Откуда берутся строки. История - журнал history, каждый перевод показывается один раз,
+        # на месте последней записи журнала (id строки - id записи журнала).
+        # "Сохраненные" - сама таблица translations (id строки - id перевода)
+        if saved_only:
+            self.joins = ""
+            self.row_id = "t.id"
+            self.condition = "t.saved = 1"
+        else:
+            self.joins = "JOIN history h ON h.translation_id = t.id"
+            self.row_id = "h.id"
+            self.condition = "h.id = (SELECT MAX(id) FROM history WHERE translation_id = t.id)"
+
+        # Есть ли в БД полнотекстовый индекс (SQLite может быть собран без FTS5)
+        self.fts = self.cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'translations_fts'"
+        ).fetchone() is not None
+        self.refresh()
+
+    # Перечитываем количество строк и сбрасываем загруженные строки
+    def refresh(self):
+        self.beginResetModel()
+        self.rows, self.ids = [], []
+        if self.search:
+            query, params = self.search_query("COUNT(*)")
+            self.total = self.cur.execute(query, params).fetchone()[0]
+        else:
+            query = f"SELECT COUNT(*) FROM translations t {self.joins} WHERE {self.condition}"
+            self.total = self.cur.execute(query).fetchone()[0]
+        self.endResetModel()
+
+    # ------------------------------------ Поиск ------------------------------------
+
+    # Показываем только переводы, подходящие под запрос (пустая строка - показать все)
+    def set_search(self, search):
+        self.search = search.strip()
+        self.refresh()
+
+    # Запрос пользователя в синтаксисе FTS5: каждое слово ищется как префикс
+    @staticmethod
+    def fts_query(search):
+        words = search.split()
+        return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+    # SQL-запрос поиска, отсортированный по релевантности
+    def search_query(self, columns):
+        if self.fts:
+            query = f"""SELECT {columns}
+                        FROM translations_fts f JOIN translations t ON t.id = f.rowid {self.joins}
+                        WHERE translations_fts MATCH ? AND {self.condition}"""
+            params = [self.fts_query(self.search)]
+            order = "ORDER BY f.rank"
+        else:
+            # Без FTS5 ищем обычным перебором
+            query = f"""SELECT {columns}
+                        FROM translations t {self.joins}
+                        WHERE (t.text LIKE ? OR t.output LIKE ?) AND {self.condition}"""
+            params = [f"%{self.search}%"] * 2
+            order = f"ORDER BY {self.row_id}"
+        if columns != "COUNT(*)":
+            query += f" {order} LIMIT ? OFFSET ?"
+        return query, params
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(self.rows[index.row()][index.column() + 1])
+        return None
+
+    # Есть ли в БД еще не загруженные строки
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.rows) < self.total
+
+    # Загружаем следующую страницу строк (вызывается представлением при прокрутке)
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self.search:
+            # Результаты поиска отсортированы по релевантности, поэтому листаем их через OFFSET
+            query, params = self.search_query(f"{self.row_id}, t.text, t.input_lang, t.output_lang")
+            page = self.cur.execute(query, params + [self.page_size, len(self.rows)]).fetchall()
+        else:
+            last_id = self.ids[-1] if self.ids else -1
+            query = f"""SELECT {self.row_id}, t.text, t.input_lang, t.output_lang
+                        FROM translations t {self.joins}
+                        WHERE {self.row_id} > ? AND {self.condition}
+                        ORDER BY {self.row_id}
+                        LIMIT ?"""
+            page = self.cur.execute(query, [last_id, self.page_size]).fetchall()
+        if not page:
+            self.total = len(self.rows)
+            return
+
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        for row_id, text, input_lang, output_lang in page:
+            self.rows.append(self.make_row(row_id, [text, input_lang, output_lang]))
+            self.ids.append(row_id)  # При поиске порядок другой, но ids используются только без поиска
+        self.endInsertRows()
+
+    # Строка таблицы: полный текст в памяти не храним
+    def make_row(self, row_id, data):
+        text, input_lang, output_lang = data
+        return [row_id, text[:self.preview_length], input_lang, output_lang]
+
+    # ------------- Инкрементальные изменения (без перечитывания всей таблицы) -------------
+
+    # В БД добавлена строка row_id. Если она попадает в уже загруженную часть таблицы
+    # (или загружено все), то показываем ее, иначе она подгрузится при прокрутке
+    def insert_row(self, row_id, data):
+        fully_loaded = len(self.rows) == self.total
+        self.total += 1
+
+        position = bisect_left(self.ids, row_id)
+        if position < len(self.ids) and self.ids[position] == row_id:
+            return  # Строка уже успела загрузиться при прокрутке
+        if position == len(self.rows) and not fully_loaded:
+            return
+
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, self.make_row(row_id, data))
+        self.ids.insert(position, row_id)
+        self.endInsertRows()
+
+    # Из БД удалена строка row_id
+    def remove_row(self, row_id):
+        self.total -= 1
+
+        position = bisect_left(self.ids, row_id)
+        if position == len(self.ids) or self.ids[position] != row_id:
+            return  # Строка еще не была загружена
+
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self.rows[position]
+        del self.ids[position]
+        self.endRemoveRows()
+
+    # В журнал истории добавлена запись event_id. Если у перевода была предыдущая запись
+    # previous_id, то он переезжает в конец истории (в "сохраненных" ничего не меняется)
+    def translation_saved(self, event_id, previous_id, data):
+        if self.saved_only:
+            return
+        if self.search:
+            self.refresh()  # Результаты поиска невелики, их проще перечитать
+            return
+        if previous_id is not None:
+            self.remove_row(previous_id)
+        self.insert_row(event_id, data)
+
+    # У перевода row_id изменилось значение поля saved
+    def saved_changed(self, row_id, data, saved):
+        if not self.saved_only:
+            return
+        if self.search:
+            self.refresh()
+            return
+        if saved:
+            self.insert_row(row_id, data)
+        else:
+            self.remove_row(row_id)
+
+    # Все строки удалены
+    def clear(self):
+        self.beginResetModel()
+        self.rows, self.ids = [], []
+        self.total = 0
+        self.endResetModel()
+
+    # Полные данные перевода в строке row: [text, input_lang, output_lang]
+    def get_row(self, row):
+        if not 0 <= row < len(self.rows):
+            return None
+        query = f"SELECT t.text, t.input_lang, t.output_lang FROM translations t {self.joins} WHERE {self.row_id} = ?"
+        result = self.cur.execute(query, [self.rows[row][0]]).fetchone()
+        return list(result) if result is not None else None
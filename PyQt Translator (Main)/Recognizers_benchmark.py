@@ -0,0 +1,149 @@
+""" Сравнение способов распознавания речи на записанных WAV-файлах: время загрузки модели,
+    время распознавания каждого файла, скорость относительно реального времени и доля ошибок в словах.
+    Рядом с файлом может лежать эталонный текст с тем же именем и расширением .txt.
+    По умолчанию используются записи из fixtures/speech. Если для эталонного текста нет записи,
+    то ее можно синтезировать через pyttsx3 (--synthesize)
+
+    python Recognizers_benchmark.py [папка] -l ru [--synthesize] """
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import speech_recognition as sr
+
+from Speech_recognizers import MODEL_DIR, SpeechRecognizers
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "speech")  # Записи по умолчанию
+
+
+# Доля ошибок в словах (WER): расстояние Левенштейна между списками слов, деленное на длину эталона
+def word_error_rate(reference, hypothesis):
+    reference = reference.lower().split()
+    hypothesis = hypothesis.lower().split()
+    if not reference:
+        return float(bool(hypothesis))
+
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+# Синтезируем записи для эталонных текстов, у которых их нет. Возвращает количество новых записей
+def synthesize_fixtures(directory, language):
+    import pyttsx3  # Библиотека для произношения текста
+
+    from Get_voices import pyttsx3_voices
+
+    engine = pyttsx3.init()
+    voice = pyttsx3_voices(engine).get(language)
+    if voice is not None:
+        engine.setProperty("voice", voice)
+
+    count = 0
+    for reference_path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        path = os.path.splitext(reference_path)[0] + ".wav"
+        if os.path.exists(path):
+            continue
+        with open(reference_path, encoding="utf-8") as f:
+            engine.save_to_file(f.read().strip(), path)
+        count += 1
+    engine.runAndWait()  # Файлы записываются здесь
+    return count
+
+
+# Записи и эталонные тексты (None, если эталона нет)
+def load_fixtures(directory, recognizer):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with sr.AudioFile(path) as source:
+            audio = recognizer.record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+        reference = None
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read().strip()
+        fixtures.append((os.path.basename(path), audio, duration, reference))
+    return fixtures
+
+
+def benchmark(backend, fixtures, recognizer, language, repeat):
+    start = time.perf_counter()
+    backend.load(language)
+    load_time = time.perf_counter() - start
+    print(f"\n{backend.title}: загрузка {load_time:.2f} с")
+
+    total_audio = total_time = 0
+    errors = []
+    for name, audio, duration, reference in fixtures:
+        latencies = []
+        text = ""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                text = backend.recognize(recognizer, audio, language)
+            except sr.UnknownValueError:
+                text = ""
+            except sr.RequestError as e:
+                print(f"  {name}: {e}")
+                break
+            latencies.append(time.perf_counter() - start)
+        if not latencies:
+            continue
+
+        latency = min(latencies)  # Лучшее время из repeat попыток
+        total_audio += duration * len(latencies)
+        total_time += sum(latencies)
+        line = f"  {name}: {duration:.1f} с записи, {latency:.3f} с, RTF {latency / duration:.3f}"
+        if reference is not None:
+            errors.append(word_error_rate(reference, text))
+            line += f", WER {errors[-1]:.1%}"
+        print(line)
+
+    if total_time:
+        print(f"  Итого: {total_audio:.1f} с записи за {total_time:.2f} с "
+              f"({total_audio / total_time:.1f}x реального времени)")
+    if errors:
+        print(f"  Средний WER: {sum(errors) / len(errors):.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение способов распознавания речи")
+    parser.add_argument("fixtures", nargs="?", default=FIXTURES_DIR, help="папка с WAV-файлами")
+    parser.add_argument("-l", "--language", default="ru", help="язык записей (ru, en, ...)")
+    parser.add_argument("-b", "--backend", action="append", help="способ распознавания (vosk, google)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="сколько раз распознавать каждый файл")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="папка с моделями Vosk")
+    parser.add_argument("--synthesize", action="store_true", help="синтезировать недостающие записи через pyttsx3")
+    args = parser.parse_args(argv)
+
+    if args.synthesize:
+        print(f"Синтезировано записей: {synthesize_fixtures(args.fixtures, args.language)}")
+
+    recognizer = sr.Recognizer()
+    fixtures = load_fixtures(args.fixtures, recognizer)
+    if not fixtures:
+        sys.exit(f"В папке {args.fixtures} нет WAV-файлов (их можно синтезировать: --synthesize)")
+
+    recognizers = SpeechRecognizers(args.model_dir)
+    backends = recognizers.available(args.language)
+    if args.backend:
+        backends = [backend for backend in backends if backend.name in args.backend]
+    for name in set(args.backend or []) - {backend.name for backend in backends}:
+        print(f"{name}: не поддерживает язык {args.language} или не установлен", file=sys.stderr)
+
+    for backend in backends:
+        benchmark(backend, fixtures, recognizer, args.language, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+""" Повторные попытки запросов с экспоненциальной задержкой и "предохранитель" (circuit breaker) """
+
+import random
+import threading
+import time
+from collections import Counter
+
+
+# Предохранитель разомкнут: запросы временно не отправляются
+class CircuitOpenError(Exception):
+    pass
+
+
+# Запрос был отменен во время ожидания следующей попытки
+class RetryCancelled(Exception):
+    pass
+
+
+# После N ошибок подряд перестаем отправлять запросы на время cooldown секунд,
+# затем пропускаем один пробный запрос ("полуоткрытое" состояние)
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold  # Сколько ошибок подряд размыкают предохранитель
+        self.cooldown = cooldown  # Сколько секунд запросы не отправляются
+        self.failures = 0  # Количество ошибок подряд
+        self.opened_at = 0.0  # Когда предохранитель разомкнулся
+        self.state = self.CLOSED
+        self.lock = threading.Lock()
+
+    # Можно ли сейчас отправить запрос
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN  # Пропускаем один пробный запрос
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    # Забываем прошлые ошибки (например, при смене сервиса)
+    def reset(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = 0.0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    # Сколько секунд осталось до следующей пробной попытки
+    def remaining(self):
+        with self.lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+# Ограниченное количество попыток со случайной ("full jitter") экспоненциальной задержкой
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=8.0, breaker=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay  # Задержка перед второй попыткой (до разброса)
+        self.max_delay = max_delay  # Максимальная задержка между попытками
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+        # Счетчики: сколько раз срабатывал каждый путь
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.stats_lock:
+            self.stats[name] += value
+
+    def get_stats(self):
+        with self.stats_lock:
+            return dict(self.stats)
+
+    # Сбрасываем предохранитель и счетчики
+    def reset(self):
+        self.breaker.reset()
+        with self.stats_lock:
+            self.stats.clear()
+
+    # Задержка перед попыткой номер attempt + 1
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    # Вызываем func, повторяя при ошибках.
+    # on_error(e) вызывается после каждой неудачной попытки (например, чтобы пересоздать клиент),
+    # cancel_event прерывает ожидание между попытками
+    def call(self, func, on_error=None, cancel_event=None):
+        self.count("calls")
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                self.count("circuit_open")
+                raise CircuitOpenError(
+                    f"Сервис недоступен, повтор через {self.breaker.remaining():.0f} с."
+                )
+            try:
+                result = func()
+            except Exception as e:
+                self.breaker.record_failure()
+                self.count("errors")
+                if on_error is not None:
+                    on_error(e)
+                if attempt == self.max_attempts:
+                    self.count("failures")
+                    raise
+
+                self.count("retries")
+                delay = self.delay(attempt)
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        self.count("cancelled")
+                        raise RetryCancelled() from e
+                else:
+                    time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                self.count("successes")
+                if attempt > 1:
+                    self.count("recovered")
+                return result
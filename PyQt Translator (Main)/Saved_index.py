@@ -0,0 +1,39 @@
+""" Хранимое в памяти состояние "сохранен ли перевод", чтобы не обращаться к БД при каждом нажатии клавиши """
+
+import hashlib
+
+
+class SavedIndex:
+    def __init__(self):
+        # Хеш (text, input_lang, output_lang) -> значение поля saved (0 или 1)
+        self.index = {}
+
+    # Ключ перевода: короткий хеш вместо полного текста экономит память
+    @staticmethod
+    def make_key(text, input_lang, output_lang):
+        data = "\0".join([input_lang, output_lang, text]).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    # Загружаем состояние всех переводов из БД (один раз при запуске)
+    def load(self, cursor):
+        query = "SELECT text, input_lang, output_lang, saved FROM translations"
+        self.index = {
+            self.make_key(text, input_lang, output_lang): saved
+            for text, input_lang, output_lang, saved in cursor.execute(query)
+        }
+
+    # Значение saved для перевода или None, если такого перевода нет в БД
+    def get(self, data):
+        return self.index.get(self.make_key(*data))
+
+    def set(self, data, saved):
+        self.index[self.make_key(*data)] = saved
+
+    # Все переводы убраны из "сохраненных"
+    def clear_saved(self):
+        for key in self.index:
+            self.index[key] = 0
+
+    # История удалена вместе со всеми переводами
+    def clear(self):
+        self.index = {}
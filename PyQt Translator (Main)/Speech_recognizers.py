@@ -0,0 +1,97 @@
+""" Способы распознавания речи: сервис Google (нужен интернет) и Vosk (работает без интернета).
+    Способ выбирается отдельно для каждого языка """
+
+import importlib.util
+import json
+import os
+import threading
+
+MODEL_DIR = os.path.join("models", "vosk")  # Модели Vosk: models/vosk/<язык>, например models/vosk/ru
+
+
+# Распознавание через сервис Google (как раньше)
+class GoogleRecognizer:
+    name = "google"
+    title = "Google (онлайн)"
+
+    def supports(self, language):
+        return True
+
+    # Загружать нечего
+    def load(self, language):
+        pass
+
+    def recognize(self, recognizer, audio, language):
+        lang = f"{language.upper()}-{language}"  # Переписываем переменную language в формат "XY-xy"
+        return recognizer.recognize_google(audio, language=lang)
+
+
+# Распознавание без интернета через Vosk. Модель каждого языка загружается один раз
+# и остается в памяти, поэтому все фразы после первой распознаются быстро
+class VoskRecognizer:
+    name = "vosk"
+    title = "Vosk (офлайн)"
+    sample_rate = 16000
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self.models = {}  # Язык -> загруженная модель
+        self.lock = threading.Lock()
+
+    def get_model_path(self, language):
+        return os.path.join(self.model_dir, language)
+
+    # Vosk установлен и для языка скачана модель
+    def supports(self, language):
+        return (importlib.util.find_spec("vosk") is not None
+                and os.path.isdir(self.get_model_path(language)))
+
+    # Загружаем модель заранее, чтобы первая фраза распознавалась так же быстро, как остальные
+    def load(self, language):
+        self.get_model(language)
+
+    def get_model(self, language):
+        with self.lock:
+            if language not in self.models:
+                import vosk  # Библиотека для распознавания речи без интернета
+                vosk.SetLogLevel(-1)
+                self.models[language] = vosk.Model(self.get_model_path(language))
+            return self.models[language]
+
+    def recognize(self, recognizer, audio, language):
+        import vosk
+        from speech_recognition import UnknownValueError
+
+        # Распознаватель легкий, создается на каждую фразу; тяжелая модель - общая
+        kaldi = vosk.KaldiRecognizer(self.get_model(language), self.sample_rate)
+        kaldi.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(kaldi.FinalResult()).get("text", "")
+        if not text:
+            raise UnknownValueError()
+        return text
+
+
+# Все способы распознавания и выбранный способ для каждого языка.
+# Если способ для языка не выбран, то используется офлайн-распознавание (если для языка есть модель)
+class SpeechRecognizers:
+    def __init__(self, model_dir=MODEL_DIR):
+        self.backends = {
+            backend.name: backend for backend in [VoskRecognizer(model_dir), GoogleRecognizer()]
+        }
+        self.selected = {}  # Язык -> название способа распознавания
+
+    # Способы, которые подходят для языка
+    def available(self, language):
+        return [backend for backend in self.backends.values() if backend.supports(language)]
+
+    def select(self, language, name):
+        self.selected[language] = name
+
+    def get(self, language):
+        backend = self.backends.get(self.selected.get(language))
+        if backend is not None and backend.supports(language):
+            return backend
+        return self.available(language)[0]
+
+    def recognize(self, recognizer, audio, language):
+        return self.get(language).recognize(recognizer, audio, language)
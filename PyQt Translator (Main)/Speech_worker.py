@@ -0,0 +1,223 @@
+""" Воспроизведение текста в отдельном потоке: очередь текстов, пауза, пропуск и остановка """
+
+import os
+import threading
+from collections import deque
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Text_chunks import split_units
+
+SENTENCE_LEN = 300  # Более длинные предложения воспроизводятся по частям
+
+
+# Текст делится на предложения: воспроизведение начинается сразу после первого из них,
+# а остановить или поставить на паузу можно между любыми словами
+def split_sentences(text):
+    return [unit.strip() for unit in split_units(text, SENTENCE_LEN) if unit.strip()]
+
+
+# Поток воспроизведения. Движок pyttsx3 создается и используется только в этом потоке
+# (в Windows движок SAPI работает только в том потоке, где он был создан),
+# обработчики событий движка подключаются один раз. Голоса тоже получаются через движок
+# этого потока, поэтому голос для языка выбирается здесь, а не в главном потоке.
+# Если заданы cache (AudioCache) и player, то предложения синтезируются в файлы и
+# воспроизводятся из кеша, иначе произносятся движком напрямую
+class SpeechWorker(QObject):
+    state_changed = pyqtSignal(str)  # "playing", "paused" или "idle"
+    progress = pyqtSignal(int, int)  # (номер предложения, всего предложений) текущего текста
+    error = pyqtSignal(str)
+
+    def __init__(self, engine_factory, timer=None, parent=None, cache=None, player=None, voices_factory=None):
+        super().__init__(parent)
+        self.engine_factory = engine_factory  # Функция, создающая движок pyttsx3
+        self.voices_factory = voices_factory  # Функция, получающая {язык: id голоса} по движку
+        self.voices = {}  # Голоса, найденные в потоке воспроизведения
+        self.timer = timer  # Время создания движка записывается в StartupTimer
+        self.cache = cache  # Кеш синтезированной речи на диске
+        self.player = player  # Проигрыватель файлов из кеша
+
+        self.condition = threading.Condition()  # Защищает все поля ниже
+        self.items = deque()  # Очередь текстов: [язык, [предложения]]
+        self.current = None  # Текст, который воспроизводится сейчас: [язык, [предложения], номер]
+        self.paused = False
+        self.interrupt = False  # Прервать текущее предложение (пауза, пропуск, остановка)
+        self.closed = False
+        self.state = "idle"
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # ------------------------- Управление (из любого потока) -------------------------
+
+    # Добавляем текст в очередь воспроизведения. Голос для языка выбирается в потоке воспроизведения
+    def speak(self, text, language=None):
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        with self.condition:
+            self.items.append([language, sentences])
+            self.paused = False
+            self.condition.notify()
+
+    # Останавливаем воспроизведение и очищаем очередь
+    def stop(self):
+        with self.condition:
+            self.items.clear()
+            self.current = None
+            self.paused = False
+            self.interrupt = True
+            self.condition.notify()
+
+    # Переходим к следующему тексту в очереди
+    def skip(self):
+        with self.condition:
+            self.current = None
+            self.interrupt = True
+            self.condition.notify()
+
+    # Пауза: текущее предложение прерывается и после продолжения воспроизводится сначала
+    def pause(self):
+        with self.condition:
+            if self.current is not None or self.items:
+                self.paused = True
+                self.interrupt = True
+                self.condition.notify()
+
+    def resume(self):
+        with self.condition:
+            self.paused = False
+            self.condition.notify()
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def close(self, timeout=1):
+        with self.condition:
+            self.closed = True
+            self.items.clear()
+            self.current = None
+            self.interrupt = True
+            self.condition.notify()
+        self.thread.join(timeout)
+
+    # ------------------------------ Поток воспроизведения ------------------------------
+
+    def set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(state)
+
+    # Голос для языка: если его нет, то русский, а если нет и его - голос по умолчанию (None)
+    def get_voice(self, language):
+        return self.voices.get(language, self.voices.get("ru"))
+
+    # Ждем, пока будет что воспроизводить, и берем следующее предложение
+    def next_sentence(self):
+        with self.condition:
+            while not self.closed and (self.paused or (self.current is None and not self.items)):
+                self.set_state("paused" if self.paused else "idle")
+                self.condition.wait()
+            if self.closed:
+                return None
+
+            if self.current is None:
+                language, sentences = self.items.popleft()
+                self.current = [language, sentences, 0]
+            language, sentences, index = self.current
+            self.interrupt = False
+            self.set_state("playing")
+            self.progress.emit(index + 1, len(sentences))
+            return self.current, self.get_voice(language), sentences[index]
+
+    # Предложение воспроизведено: переходим к следующему (если его не прервали)
+    def sentence_finished(self, item):
+        with self.condition:
+            if self.interrupt or self.current is not item:
+                return
+            item[2] += 1
+            if item[2] >= len(item[1]):
+                self.current = None
+
+    # Файл с речью для предложения: из кеша или синтезированный и добавленный в кеш
+    def get_audio(self, engine, text, voice):
+        key = self.cache.make_key(text, voice, engine.getProperty("rate"))
+        path = self.cache.get(key)
+        if path is None:
+            temp_path = self.cache.temp_path(key)
+            engine.save_to_file(text, temp_path)
+            engine.runAndWait()
+            if self.interrupt:
+                # Синтез прерван: файл может быть неполным
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return None
+            path = self.cache.add(key, temp_path)
+        return path
+
+    # Произносим предложение (из кеша, если он есть).
+    # Если проигрыватель не работает (например, нет звукового сервера), то до конца работы
+    # программы произносим текст движком напрямую, без кеша
+    def say(self, engine, text, voice):
+        if voice is not None:
+            engine.setProperty("voice", voice)
+        if self.cache is not None and self.player is not None:
+            path = self.get_audio(engine, text, voice)
+            if self.interrupt:
+                return
+            if path is not None:
+                try:
+                    self.player.play(path, lambda: self.interrupt)
+                    return
+                except (OSError, RuntimeError) as e:
+                    print(e, "<---- Проигрыватель не работает, текст произносится движком")
+                    self.player = None
+        engine.say(text)
+        engine.runAndWait()
+
+    # Выполняем функцию, записывая ее время в StartupTimer (если он есть)
+    def timed(self, name, function, *args):
+        if self.timer is None:
+            return function(*args)
+        with self.timer.phase(name):
+            return function(*args)
+
+    def run(self):
+        try:
+            engine = self.timed("Движок pyttsx3", self.engine_factory)
+        except Exception as e:
+            print(e, "<---- Не удалось запустить синтез речи")
+            self.error.emit(str(e))
+            return
+
+        # Голоса получаем через движок этого потока: в другом потоке движок SAPI не работает
+        if self.voices_factory is not None:
+            try:
+                self.voices = self.timed("Голоса", self.voices_factory, engine)
+            except Exception as e:
+                print(e, "<---- Не удалось получить голоса")
+
+        # Срабатывает перед каждым словом: так воспроизведение можно прервать посреди предложения
+        def on_word(name, location, length):
+            if self.interrupt:
+                engine.stop()
+
+        engine.connect("started-word", on_word)
+
+        while True:
+            sentence = self.next_sentence()
+            if sentence is None:
+                break
+            item, voice, text = sentence
+            try:
+                self.say(engine, text, voice)
+            except Exception as e:
+                print(e, "<---- Ошибка воспроизведения")
+                self.error.emit(str(e))
+                self.skip()
+            self.sentence_finished(item)
+
+        self.set_state("idle")
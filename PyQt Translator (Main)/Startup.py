@@ -0,0 +1,88 @@
+""" Отложенная инициализация тяжелых библиотек и замер времени запуска приложения """
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Замер времени этапов запуска
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # [(время начала от начала запуска, название, длительность, в фоне ли)]
+        self.marks = []  # [(время от начала запуска, название)]
+        self.lock = threading.Lock()  # Этапы могут выполняться и в фоновых потоках
+
+    # Замеряем, сколько выполняется блок кода
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            background = threading.current_thread() is not threading.main_thread()
+            with self.lock:
+                self.phases.append((start - self.started, name, time.perf_counter() - start, background))
+
+    # Отмечаем момент запуска (например, "окно показано")
+    def mark(self, name):
+        with self.lock:
+            self.marks.append((time.perf_counter() - self.started, name))
+
+    # Этапы и отметки в порядке их начала
+    def report(self):
+        with self.lock:
+            lines = [
+                (moment, f"  {name}: {duration * 1000:.0f} мс" + (" (в фоне)" if background else ""))
+                for moment, name, duration, background in self.phases
+            ]
+            lines += [(moment, f"  {name}: через {moment * 1000:.0f} мс") for moment, name in self.marks]
+        return "\n".join(["Время запуска:"] + [line for moment, line in sorted(lines)])
+
+
+NOT_LOADED = object()
+
+
+# Объект, который создается только при первом обращении (или заранее, в фоновом потоке)
+class Lazy:
+    def __init__(self, name, factory, timer=None):
+        self.name = name
+        self.factory = factory  # Функция без аргументов, создающая объект
+        self.timer = timer  # Время создания записывается в StartupTimer
+        self.value = NOT_LOADED
+        self.lock = threading.Lock()
+
+    # Объект создается один раз, даже если к нему обращаются из разных потоков одновременно
+    def get(self):
+        if self.value is NOT_LOADED:
+            with self.lock:
+                if self.value is NOT_LOADED:
+                    if self.timer is not None:
+                        with self.timer.phase(self.name):
+                            self.value = self.factory()
+                    else:
+                        self.value = self.factory()
+        return self.value
+
+    def is_loaded(self):
+        return self.value is not NOT_LOADED
+
+    # Создаем объект заранее (ошибка не мешает работе: она повторится при первом обращении)
+    def warm(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(e, f"<---- Не удалось загрузить {self.name}")
+
+
+# Загружаем объекты по очереди в фоновом потоке, затем вызываем on_done() (тоже в фоновом потоке)
+def warm_up(lazies, on_done=None):
+    def run():
+        for lazy in lazies:
+            lazy.warm()
+        if on_done is not None:
+            on_done()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
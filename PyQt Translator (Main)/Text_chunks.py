@@ -0,0 +1,54 @@
+""" Разбиение длинного текста на части, которые можно перевести за один запрос """
+
+import re
+from collections import namedtuple
+
+# Часть текста: пробельные символы до, сам текст и пробельные символы после.
+# Пробелы и переводы строк не отправляются переводчику, а возвращаются на место при сборке
+Chunk = namedtuple("Chunk", ["prefix", "text", "suffix"])
+
+# Предложение вместе с пробелами после него, либо группа переводов строк (граница абзаца)
+SENTENCE = re.compile(r"[^\n]+?(?:[.!?…。！？]+[\"'»”)\]]*(?:[ \t]+|(?=\n)|$)|(?=\n)|$)|\n+")
+
+
+# Делим текст на предложения и абзацы. Слишком длинные предложения режем по пробелам
+def split_units(text, max_len):
+    units = []
+    for match in SENTENCE.finditer(text):
+        unit = match.group()
+        while len(unit) > max_len:
+            cut = unit.rfind(" ", 0, max_len) + 1  # Режем после последнего пробела
+            if cut <= 0:
+                cut = max_len
+            units.append(unit[:cut])
+            unit = unit[cut:]
+        if unit:
+            units.append(unit)
+    return units
+
+
+# Собираем предложения в части длиной не более max_len символов
+def split_text(text, max_len):
+    parts, current = [], ""
+    for unit in split_units(text, max_len):
+        if current and len(current) + len(unit) > max_len:
+            parts.append(current)
+            current = ""
+        current += unit
+    if current:
+        parts.append(current)
+
+    chunks = []
+    for part in parts:
+        body = part.strip()
+        start = part.find(body) if body else len(part)
+        chunks.append(Chunk(part[:start], body, part[start + len(body):]))
+    return chunks
+
+
+# Собираем переведенный текст в исходном порядке
+def join_chunks(chunks, translations):
+    return "".join(
+        chunk.prefix + translation + chunk.suffix
+        for chunk, translation in zip(chunks, translations)
+    )
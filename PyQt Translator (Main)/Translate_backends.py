@@ -0,0 +1,160 @@
+""" Сервисы перевода: Google Translate, память переводов из БД (работает без сети)
+    и HTTP-сервер с API как у LibreTranslate (например, Fake_translate_server.py для тестов).
+    Каждый сервис переводит фрагмент методом translate(text, in_lang, out_lang) -> str из любого потока,
+    reset() вызывается после ошибки перед повторной попыткой.
+    cacheable - можно ли записывать перевод в БД как точный перевод текста """
+
+import importlib
+import json
+import re
+import threading
+import urllib.error
+import urllib.request
+
+import Data_base
+from Startup import Lazy
+
+# Библиотека для перевода текста. Импортируется долго, поэтому только при первом запросе
+# (или заранее в фоне, см. Translator.py)
+googletrans = Lazy("googletrans", lambda: importlib.import_module("googletrans"))
+
+WORD = re.compile(r"\w+")
+
+
+# Google Translate через googletrans (нужен интернет)
+class GoogleBackend:
+    name = "google"
+    title = "Google Translate"
+    cacheable = True
+
+    def __init__(self):
+        self.local = threading.local()  # У каждого потока свой экземпляр Translator
+
+    def get_translator(self):
+        if not hasattr(self.local, "translator"):
+            self.local.translator = googletrans.get().Translator()
+        return self.local.translator
+
+    def translate(self, text, in_lang, out_lang):
+        return self.get_translator().translate(text, src=in_lang, dest=out_lang).text
+
+    # После ошибки пересоздаем Translator
+    def reset(self):
+        self.local.__dict__.pop("translator", None)
+
+
+# Перевод без сети: каждая строка ищется в БД с переводами целиком, а если ее там нет,
+# то переводится по словам (словарь - переводы отдельных слов из той же БД).
+# Неизвестные слова остаются без перевода. Количество строк всегда сохраняется.
+# Перевод по словам - только догадка, поэтому в БД он не записывается
+class MemoryBackend:
+    name = "memory"
+    title = "Память переводов (офлайн)"
+    cacheable = False
+
+    def __init__(self, db_name=Data_base.DB_NAME):
+        self.db_name = db_name
+        self.local = threading.local()  # Соединение с БД для каждого потока
+        self.dictionaries = {}  # (in_lang, out_lang) -> {слово: перевод}, загружается один раз
+        self.lock = threading.Lock()
+
+    def get_cursor(self):
+        if not hasattr(self.local, "cur"):
+            self.local.cur = Data_base.connect(self.db_name).cursor()
+        return self.local.cur
+
+    def get_dictionary(self, in_lang, out_lang):
+        with self.lock:
+            if (in_lang, out_lang) not in self.dictionaries:
+                query = """SELECT text, output FROM translations
+                           WHERE input_lang = ? AND output_lang = ? AND output IS NOT NULL
+                           AND text NOT LIKE '% %' AND length(text) <= 50"""
+                self.dictionaries[in_lang, out_lang] = {
+                    text.strip().lower(): output.strip()
+                    for text, output in self.get_cursor().execute(query, (in_lang, out_lang))
+                }
+            return self.dictionaries[in_lang, out_lang]
+
+    def lookup(self, text, in_lang, out_lang):
+        query = """SELECT output FROM translations
+                   WHERE text = ? AND input_lang = ? AND output_lang = ? AND output IS NOT NULL"""
+        row = self.get_cursor().execute(query, (text, in_lang, out_lang)).fetchone()
+        return row[0] if row is not None else None
+
+    # Перевод по словам с сохранением заглавной первой буквы
+    def translate_words(self, line, dictionary):
+        def replace(match):
+            word = match.group()
+            output = dictionary.get(word.lower())
+            if output is None:
+                return word
+            return output[:1].upper() + output[1:] if word[:1].isupper() else output
+
+        return WORD.sub(replace, line)
+
+    def translate_line(self, line, in_lang, out_lang):
+        if not line.strip():
+            return line
+        output = self.lookup(line, in_lang, out_lang)
+        if output is None:
+            output = self.lookup(line.strip(), in_lang, out_lang)
+        if output is not None:
+            return output
+        return self.translate_words(line, self.get_dictionary(in_lang, out_lang))
+
+    def translate(self, text, in_lang, out_lang):
+        output = self.lookup(text, in_lang, out_lang)
+        if output is not None:
+            return output
+        return "\n".join(self.translate_line(line, in_lang, out_lang) for line in text.split("\n"))
+
+    # Перечитываем словари (например, после импорта переводов)
+    def reset(self):
+        with self.lock:
+            self.dictionaries.clear()
+
+
+# Ответ сервера с ошибкой
+class HttpBackendError(Exception):
+    pass
+
+
+# HTTP-сервер перевода с API как у LibreTranslate:
+# POST /translate {"q", "source", "target", "format"} -> {"translatedText"}
+class HttpBackend:
+    name = "http"
+    title = "HTTP-сервер"
+    cacheable = True
+
+    def __init__(self, url="http://127.0.0.1:5000", timeout=10.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout  # Сколько секунд ждать ответа
+
+    def translate(self, text, in_lang, out_lang):
+        body = json.dumps({"q": text, "source": in_lang, "target": out_lang, "format": "text"}).encode("utf-8")
+        request = urllib.request.Request(
+            self.url + "/translate", data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                result = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise HttpBackendError(f"{self.url}: HTTP {e.code} {e.reason}") from e
+        return result["translatedText"]
+
+    def reset(self):
+        pass
+
+
+BACKENDS = {backend.name: backend for backend in [GoogleBackend, MemoryBackend, HttpBackend]}
+
+
+# Создаем сервис перевода по названию ("google", "memory" или "http")
+def make_backend(name, db_name=Data_base.DB_NAME, url=None):
+    if name == MemoryBackend.name:
+        return MemoryBackend(db_name)
+    if name == HttpBackend.name:
+        return HttpBackend(url) if url else HttpBackend()
+    if name == GoogleBackend.name:
+        return GoogleBackend()
+    raise ValueError(f"Неизвестный сервис перевода: {name}")
@@ -0,0 +1,164 @@
+""" Консольный пакетный переводчик файлов: работает без графического интерфейса,
+    использует тот же переводчик, кеш переводов и БД, что и приложение """
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import Data_base
+import File_stream
+from Batch_translator import BatchTranslator
+from Db_writer import DbWriter
+from Fuzzy_memory import FuzzyMemory
+from Translate_backends import BACKENDS, GoogleBackend, make_backend
+from Translate_client import TranslateClient
+
+
+class FileTranslator:
+    def __init__(self, in_lang, out_lang, db_name=Data_base.DB_NAME, jobs=4, max_symbols=3100,
+                 use_cache=True, history=False, backend=None, fuzzy=None):
+        self.in_lang = in_lang
+        self.out_lang = out_lang
+        self.max_symbols = max_symbols  # Максимальная длина одного запроса
+        self.use_cache = use_cache  # Брать ли уже известные переводы из БД
+        self.history = history  # Добавлять ли переводы в историю приложения
+        # Брать перевод похожего фрагмента из БД, если сходство не меньше fuzzy (0..1)
+        self.fuzzy = fuzzy
+        self.fuzzy_memory = FuzzyMemory(db_name) if fuzzy else None
+
+        # Сервис перевода (по умолчанию Google Translate)
+        self.client = TranslateClient(backend=backend if backend is not None else GoogleBackend())
+        self.executor = ThreadPoolExecutor(max_workers=jobs)  # Не более jobs запросов одновременно
+        self.batch_translator = BatchTranslator(self.client.translate, max_symbols, self.executor)
+        # Сколько символов читаем за раз: примерно по одной пачке на каждый поток
+        self.block_size = jobs * max_symbols
+
+        self.con = Data_base.connect(db_name)
+        Data_base.migrate(self.con)
+        self.cur = self.con.cursor()
+        self.db_writer = DbWriter(db_name)
+
+        self.stats = Counter()
+        self.started = time.monotonic()
+
+    # Переводим блок строк и возвращаем переведенные строки (с исходными переводами строк)
+    def translate_lines(self, lines):
+        lookup = self.lookup if self.use_cache else None
+        result, new = self.batch_translator.translate_lines(lines, self.in_lang, self.out_lang, lookup)
+
+        # Новые переводы сохраняем в БД (кроме догадок памяти переводов)
+        if new:
+            self.stats["translated"] += len(new)
+            if self.client.backend.cacheable:
+                self.save(list(new.items()))
+        self.stats["lines"] += len(lines)
+        self.stats["chars"] += sum(len(line.rstrip("\r\n")) for line in lines)
+        return result
+
+    # Уже известный перевод фрагмента берем из БД
+    def lookup(self, segment):
+        output = Data_base.get_translation(self.cur, [segment, self.in_lang, self.out_lang])
+        if output is not None:
+            self.stats["cache_hits"] += 1
+        elif self.fuzzy_memory is not None:
+            matches = self.fuzzy_memory.search([segment, self.in_lang, self.out_lang], self.fuzzy, limit=1)
+            if matches:
+                self.stats["fuzzy_hits"] += 1
+                output = matches[0][2]
+        return output
+
+    # Новые переводы записываются в БД в фоновом потоке
+    def save(self, pairs):
+        if self.fuzzy_memory is not None:
+            for text, output in pairs:
+                self.fuzzy_memory.add([text, self.in_lang, self.out_lang], output)
+
+        def save_pairs(cur):
+            for text, output in pairs:
+                Data_base.save_translation(cur, [text, self.in_lang, self.out_lang], output, self.history)
+        self.db_writer.submit(save_pairs)
+
+    # Читаем source построчно, блоками по block_size символов, и сразу пишем перевод в target
+    def translate_stream(self, source, target):
+        for block in File_stream.iter_blocks(source, self.block_size):
+            target.writelines(self.translate_lines(block))
+            target.flush()
+
+    # Файл читается кусками (кодировка определяется автоматически, если не задана),
+    # перевод записывается по мере готовности блоков
+    def translate_file(self, path, output_path, encoding=None):
+        lines = File_stream.iter_lines(File_stream.read_text(path, encoding))
+        with open(output_path, "w", encoding="utf-8", newline="") as target:
+            self.translate_stream(lines, target)
+        self.stats["files"] += 1
+
+    def close(self):
+        self.db_writer.close()
+        self.executor.shutdown()
+        self.con.close()
+
+    # Итоговая статистика: скорость и доля переводов, взятых из кеша
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        hits = self.stats["cache_hits"] + self.stats["fuzzy_hits"]
+        segments = hits + self.stats["translated"]
+        hit_rate = hits / segments * 100 if segments else 0
+        lines = [
+            f"Файлов: {self.stats['files']}, строк: {self.stats['lines']}, символов: {self.stats['chars']}",
+            f"Время: {elapsed:.2f} с, {self.stats['lines'] / elapsed:.1f} строк/с, "
+            f"{self.stats['chars'] / elapsed:.0f} символов/с" if elapsed else "",
+            f"Фрагментов: {segments}, из кеша: {self.stats['cache_hits']}, "
+            f"похожих: {self.stats['fuzzy_hits']} ({hit_rate:.1f}%), "
+            f"переведено: {self.stats['translated']}",
+            f"Запросов к переводчику ({self.client.backend.title}): {self.batch_translator.requests}, "
+            f"повторов по одному: {self.batch_translator.fallbacks}",
+            f"Попытки: {self.client.retry_policy.get_stats()}",
+            f"БД: {self.db_writer.get_stats()}",
+        ]
+        return "\n".join(line for line in lines if line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный перевод текстовых файлов")
+    parser.add_argument("files", nargs="*", default=["-"], help="файлы для перевода ('-' - стандартный ввод)")
+    parser.add_argument("-s", "--src", required=True, help="язык исходного текста (ru, en, ...)")
+    parser.add_argument("-d", "--dest", required=True, help="язык перевода (ru, en, ...)")
+    parser.add_argument("-o", "--output-dir", help="папка для переведенных файлов")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="сколько запросов отправлять одновременно")
+    parser.add_argument("-e", "--encoding", help="кодировка файлов (по умолчанию определяется автоматически)")
+    parser.add_argument("--db", default=Data_base.DB_NAME, help="БД с кешем переводов")
+    parser.add_argument("-b", "--backend", choices=list(BACKENDS), default=GoogleBackend.name,
+                        help="сервис перевода (memory - по памяти переводов из БД, без сети)")
+    parser.add_argument("--url", help="адрес сервера для --backend http")
+    parser.add_argument("--max-symbols", type=int, default=3100, help="максимальная длина одного запроса")
+    parser.add_argument("--no-cache", action="store_true", help="не брать переводы из БД")
+    parser.add_argument("--fuzzy", type=int, metavar="PERCENT",
+                        help="брать из БД перевод похожего фрагмента, если сходство не меньше PERCENT")
+    parser.add_argument("--history", action="store_true", help="добавлять переводы в историю приложения")
+    args = parser.parse_args(argv)
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    backend = make_backend(args.backend, args.db, args.url)
+    translator = FileTranslator(args.src, args.dest, args.db, args.jobs, args.max_symbols,
+                                use_cache=not args.no_cache, history=args.history, backend=backend,
+                                fuzzy=args.fuzzy / 100 if args.fuzzy else None)
+    try:
+        for path in args.files:
+            if path == "-":
+                translator.translate_stream(sys.stdin, sys.stdout)
+            else:
+                output_path = File_stream.get_output_path(path, args.dest, args.output_dir)
+                translator.translate_file(path, output_path, args.encoding)
+                print(path, "->", output_path, file=sys.stderr)
+    finally:
+        translator.close()
+        print(translator.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+""" Обращение к переводчику с повторными попытками. Не зависит от интерфейса (используется и в консольной версии) """
+
+from Retry_policy import RetryPolicy, RetryCancelled
+from Translate_backends import GoogleBackend
+
+
+class TranslateClient:
+    def __init__(self, retry_policy=None, backend=None):
+        # Общие для всех запросов правила повтора и предохранитель
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        # Сервис перевода (см. Translate_backends.py), по умолчанию Google Translate
+        self.backend = backend if backend is not None else GoogleBackend()
+
+    # Меняем сервис перевода (запросы, которые уже идут, завершатся через старый).
+    # Ошибки старого сервиса не должны размыкать предохранитель для нового
+    def set_backend(self, backend):
+        self.backend = backend
+        self.retry_policy.reset()
+
+    # Перевод одного фрагмента текста (можно вызывать из любого потока).
+    # cancel_event прерывает ожидание между повторными попытками
+    def translate(self, text, in_lang, out_lang, cancel_event=None):
+        if cancel_event is not None and cancel_event.is_set():
+            raise RetryCancelled()
+        if not text:
+            return text
+
+        backend = self.backend
+
+        # При ошибке сбрасываем состояние сервиса и повторяем запрос по правилам retry_policy
+        def on_error(e):
+            print(e, "<---- Ошибка")
+            backend.reset()
+
+        return self.retry_policy.call(
+            lambda: backend.translate(text, in_lang, out_lang),
+            on_error=on_error,
+            cancel_event=cancel_event,
+        )
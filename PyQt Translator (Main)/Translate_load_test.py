@@ -0,0 +1,69 @@
+""" Нагрузочный тест переводчика без сети: запускает локальный сервер перевода с заданной задержкой
+    и долей ошибок и отправляет ему запросы через TranslateClient (с повторами и предохранителем).
+
+    python Translate_load_test.py -n 1000 -j 16 --latency 0.1 --error-rate 0.05 """
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Fake_translate_server import FakeTranslateServer
+from Retry_policy import RetryPolicy
+from Translate_backends import HttpBackend
+from Translate_client import TranslateClient
+
+
+# Значение перцентиля percent из отсортированного списка
+def percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест переводчика на локальном сервере")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="сколько запросов отправить")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="сколько запросов отправлять одновременно")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа сервера в секундах")
+    parser.add_argument("--jitter", type=float, default=0.05, help="случайная добавка к задержке в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой (0..1)")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--url", help="адрес уже запущенного сервера (иначе запускается локальный)")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        server = FakeTranslateServer(latency=args.latency, jitter=args.jitter,
+                                     error_rate=args.error_rate, seed=args.seed)
+        url = server.start()
+    client = TranslateClient(RetryPolicy(base_delay=0.05), HttpBackend(url))
+
+    # Время перевода одного текста или None, если перевод не удался
+    def send(i):
+        start = time.perf_counter()
+        try:
+            client.translate(f"Тестовое предложение номер {i}", "ru", "en")
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.stop()
+
+    latencies = sorted(result for result in results if result is not None)
+    print(f"Запросов: {args.requests}, успешно: {len(latencies)}, за {elapsed:.2f} с "
+          f"({args.requests / elapsed:.1f} запросов/с)")
+    if latencies:
+        print("Время перевода: " + ", ".join(
+            f"p{p} {percentile(latencies, p) * 1000:.0f} мс" for p in (50, 90, 99)
+        ))
+    print(f"Попытки: {client.retry_policy.get_stats()}")
+    if server is not None:
+        print(f"Сервер: {server.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+""" Перевод текста в фоновом потоке, чтобы окно не зависало во время запроса к сети """
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import Data_base
+import File_stream
+from Batch_translator import BatchTranslator
+from Retry_policy import RetryCancelled
+from Translate_client import TranslateClient
+from Text_chunks import split_text, join_chunks
+
+
+# Сигналы задачи (QRunnable не является QObject, поэтому сигналы храним отдельно)
+class TaskSignals(QObject):
+    finished = pyqtSignal(int, list, str)  # (номер запроса, [text, input_lang, output_lang], перевод)
+    error = pyqtSignal(int, str)  # (номер запроса, текст ошибки)
+    progress = pyqtSignal(int, int, int)  # (номер запроса, переведено частей, всего частей)
+    batch_finished = pyqtSignal(int, list)  # (номер запроса, [[text, input_lang, output_lang, перевод], ...])
+
+
+# Одна задача перевода, выполняемая в пуле потоков
+class TranslateTask(QRunnable):
+    def __init__(self, request_id, data, client, chunk_executor, max_symbols):
+        super().__init__()
+        self.request_id = request_id
+        self.data = data
+        self.client = client  # Общий для всех задач TranslateClient
+        self.chunk_executor = chunk_executor  # Пул потоков для перевода частей длинного текста
+        self.max_symbols = max_symbols  # Максимальная длина текста в одном запросе
+        self.cancel_event = threading.Event()  # Выставляется, если запрос устарел
+        self.signals = TaskSignals()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    # Перевод одного фрагмента текста (вызывается из любого потока)
+    def translate_text(self, text, in_lang, out_lang):
+        return self.client.translate(text, in_lang, out_lang, self.cancel_event)
+
+    # Переводчик пачками, части отправляются параллельно через chunk_executor
+    def get_batch_translator(self):
+        return BatchTranslator(self.translate_text, self.max_symbols, self.chunk_executor)
+
+    # Длинный текст делим на части и переводим их параллельно
+    def translate_document(self, text, in_lang, out_lang):
+        chunks = split_text(text, self.max_symbols)
+
+        def on_progress(done, total):
+            self.signals.progress.emit(self.request_id, done, total)
+
+        try:
+            translations = self.get_batch_translator().translate(
+                [chunk.text for chunk in chunks], in_lang, out_lang, on_progress
+            )
+        except Exception:
+            self.cancel()  # Остальные части уже не нужны
+            raise
+        return join_chunks(chunks, translations)
+
+    def run(self):
+        if self.is_cancelled():
+            return
+        text, in_lang, out_lang = self.data
+
+        try:
+            if len(text) > self.max_symbols:
+                result = self.translate_document(text, in_lang, out_lang)
+            else:
+                result = self.translate_text(text, in_lang, out_lang)
+        except RetryCancelled:
+            return
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.error.emit(self.request_id, str(e))
+            return
+
+        if not self.is_cancelled():
+            self.signals.finished.emit(self.request_id, self.data, result)
+
+
+# Перевод множества текстов (например, всей истории) пачками
+class BatchTask(TranslateTask):
+    def run(self):
+        # Группируем тексты по языковым парам: в одном запросе может быть только одна пара
+        groups = {}
+        for text, in_lang, out_lang in self.data:
+            groups.setdefault((in_lang, out_lang), []).append(text)
+
+        results = []
+        try:
+            for (in_lang, out_lang), texts in groups.items():
+                translations = self.get_batch_translator().translate(texts, in_lang, out_lang)
+                results.extend(
+                    [text, in_lang, out_lang, output] for text, output in zip(texts, translations)
+                )
+                self.signals.progress.emit(self.request_id, len(results), len(self.data))
+        except RetryCancelled:
+            return
+        except Exception as e:
+            self.signals.error.emit(self.request_id, str(e))
+
+        # Даже при ошибке возвращаем то, что успели перевести
+        if results:
+            self.signals.batch_finished.emit(self.request_id, results)
+
+
+# Перевод файла: файл читается кусками, перевод записывается в выходной файл по мере готовности,
+# поэтому расход памяти не зависит от размера файла. Уже известные переводы строк берутся из БД.
+# data = [путь к файлу, путь к файлу с переводом, input_lang, output_lang]
+class FileTask(TranslateTask):
+    block_size = 16 * 1024  # Сколько символов переводим за раз
+
+    def __init__(self, request_id, data, client, chunk_executor, max_symbols, db_name=Data_base.DB_NAME):
+        super().__init__(request_id, data, client, chunk_executor, max_symbols)
+        self.db_name = db_name
+
+    def run(self):
+        path, output_path, in_lang, out_lang = self.data
+        con = None
+        try:
+            # Соединение с БД только для чтения кеша, используется в потоке задачи
+            con = Data_base.connect(self.db_name)
+            cur = con.cursor()
+            lookup = lambda segment: Data_base.get_translation(cur, [segment, in_lang, out_lang])
+
+            encoding = File_stream.detect_encoding(path)
+            total = os.path.getsize(path)
+            done = 0
+            lines = File_stream.iter_lines(File_stream.read_text(path, encoding))
+            batch_translator = self.get_batch_translator()
+
+            with open(output_path, "w", encoding="utf-8", newline="") as target:
+                for block in File_stream.iter_blocks(lines, self.block_size):
+                    if self.is_cancelled():
+                        break
+                    result = batch_translator.translate_lines(block, in_lang, out_lang, lookup)[0]
+                    target.writelines(result)
+                    target.flush()
+
+                    # Прогресс считаем в процентах от размера исходного файла
+                    done += sum(len(line.encode(encoding, errors="replace")) for line in block)
+                    self.signals.progress.emit(self.request_id, min(done * 100 // max(total, 1), 100), 100)
+        except RetryCancelled:
+            pass
+        except Exception as e:
+            if not self.is_cancelled():
+                self.cancel()  # Остальные части уже не нужны
+                self.signals.error.emit(self.request_id, str(e))
+        finally:
+            if con is not None:
+                con.close()
+
+        # Перевод отменен или не удался: недописанный файл не оставляем
+        if self.is_cancelled():
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+            return
+
+        self.signals.finished.emit(self.request_id, self.data, output_path)
+
+
+# Управляет фоновыми переводами: выполняется только самый последний запрос
+class TranslateWorker(QObject):
+    finished = pyqtSignal(list, str)  # ([text, input_lang, output_lang], перевод)
+    error = pyqtSignal(str)
+    busy_changed = pyqtSignal(bool)  # Идет ли сейчас перевод
+    progress = pyqtSignal(int, int)  # (переведено частей, всего частей) для длинных текстов
+    batch_finished = pyqtSignal(list)  # [[text, input_lang, output_lang, перевод], ...]
+    file_finished = pyqtSignal(str)  # Путь к файлу с переводом
+
+    def __init__(self, parent=None, max_threads=2, retry_policy=None, max_symbols=3100, chunk_threads=4,
+                 backend=None, db_name=Data_base.DB_NAME):
+        super().__init__(parent)
+        self.max_symbols = max_symbols
+        self.db_name = db_name  # БД, из которой при переводе файлов берутся известные переводы
+        # Ограниченный пул для параллельного перевода частей длинных текстов
+        self.chunk_executor = ThreadPoolExecutor(max_workers=chunk_threads)
+        # Общий для всех запросов клиент переводчика (с правилами повтора и предохранителем)
+        self.client = TranslateClient(retry_policy, backend)
+        self.retry_policy = self.client.retry_policy
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.request_id = 0  # Номер последнего запроса
+        self.current_task = None
+        self.batch_task = None  # Перевод пачкой идет независимо от обычных запросов
+        self.file_task = None  # Перевод файла тоже
+
+    # Запускаем перевод, отменяя предыдущий незавершенный запрос
+    def request(self, data):
+        self.cancel()
+        self.request_id += 1
+
+        task = TranslateTask(
+            self.request_id, list(data), self.client, self.chunk_executor, self.max_symbols
+        )
+        task.signals.finished.connect(self.on_task_finished)
+        task.signals.error.connect(self.on_task_error)
+        task.signals.progress.connect(self.on_task_progress)
+        self.current_task = task
+
+        self.pool.start(task)
+        self.busy_changed.emit(True)
+
+    # Меняем сервис перевода (см. Translate_backends.py)
+    def set_backend(self, backend):
+        self.client.set_backend(backend)
+
+    # Отменяем текущий запрос, его результат будет проигнорирован
+    def cancel(self):
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.pool.tryTake(self.current_task)  # Убираем задачу из очереди, если она еще не началась
+            self.current_task = None
+            self.busy_changed.emit(False)
+
+    # Переводим список [[text, input_lang, output_lang], ...] пачками
+    def request_batch(self, items):
+        if self.batch_task is not None:
+            self.batch_task.cancel()
+
+        task = BatchTask(0, [list(item) for item in items], self.client, self.chunk_executor, self.max_symbols)
+        # Старая пачка могла быть заменена новой: обработчики получают свою задачу
+        task.signals.batch_finished.connect(lambda request_id, results: self.on_batch_finished(task, results))
+        task.signals.error.connect(lambda request_id, message: self.on_batch_error(task, message))
+        task.signals.progress.connect(lambda request_id, done, total: self.progress.emit(done, total))
+        self.batch_task = task
+
+        self.pool.start(task)
+
+    def on_batch_finished(self, task, results):
+        if task is self.batch_task:
+            self.batch_task = None
+        self.batch_finished.emit(results)  # Переводы отмененной пачки тоже верны
+
+    def on_batch_error(self, task, message):
+        if task is self.batch_task:
+            self.batch_task = None
+            self.error.emit(message)
+
+    # Переводим файл path в output_path (одновременно переводится только один файл)
+    def request_file(self, path, output_path, in_lang, out_lang):
+        if self.file_task is not None:
+            self.file_task.cancel()
+
+        task = FileTask(0, [path, output_path, in_lang, out_lang], self.client, self.chunk_executor,
+                        self.max_symbols, self.db_name)
+        # Старый перевод файла мог быть заменен новым: обработчики получают свою задачу
+        task.signals.finished.connect(lambda request_id, data, output_path: self.on_file_finished(task, output_path))
+        task.signals.error.connect(lambda request_id, message: self.on_file_error(task, message))
+        task.signals.progress.connect(lambda request_id, done, total: self.progress.emit(done, total))
+        self.file_task = task
+
+        self.pool.start(task)
+
+    def on_file_finished(self, task, output_path):
+        if task is self.file_task:
+            self.file_task = None
+        self.file_finished.emit(output_path)
+
+    def on_file_error(self, task, message):
+        if task is self.file_task:
+            self.file_task = None
+            self.error.emit(message)
+
+    def is_busy(self):
+        return self.current_task is not None
+
+    def on_task_finished(self, request_id, data, text):
+        # Результаты устаревших запросов отбрасываем
+        if request_id != self.request_id:
+            return
+        self.current_task = None
+        self.busy_changed.emit(False)
+        self.finished.emit(data, text)
+
+    def on_task_progress(self, request_id, done, total):
+        if request_id == self.request_id:
+            self.progress.emit(done, total)
+
+    def on_task_error(self, request_id, message):
+        if request_id != self.request_id:
+            return
+        self.current_task = None
+        self.busy_changed.emit(False)
+        self.error.emit(message)
+
+    # Ждем завершения потоков (при закрытии приложения)
+    def shutdown(self, timeout=1000):
+        self.cancel()
+        if self.batch_task is not None:
+            self.batch_task.cancel()
+        if self.file_task is not None:
+            self.file_task.cancel()
+        self.pool.waitForDone(timeout)
+        self.chunk_executor.shutdown(wait=False)
@@ -0,0 +1,349 @@
+""" Экспорт переводов из БД (история, "сохраненные") в файлы CSV, JSONL и TMX и импорт
+    переводов из таких файлов в кеш переводов. Файлы и БД читаются порциями,
+    поэтому расход памяти не зависит от размера истории """
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from functools import lru_cache
+from itertools import chain, islice
+from xml.sax.saxutils import escape, quoteattr
+
+import Data_base
+
+FORMATS = ("csv", "jsonl", "tmx")
+FETCH_SIZE = 1000  # Сколько строк читаем из БД за раз
+BATCH_SIZE = 50000  # Сколько переводов записываем в БД одной транзакцией при импорте
+COLUMNS = ["text", "input_lang", "output_lang", "output", "saved", "created_at"]
+
+# Символы, которые нельзя записать в XML
+INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+# Формат файла по его расширению
+def get_format(path):
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат файла: {path}")
+    return fmt
+
+
+# Переводы из БД по порядку добавления, created_at - время последнего перевода из истории.
+# Если in_lang/out_lang не заданы, то выгружаются все языковые пары
+def iter_translations(cur, saved_only=False, in_lang=None, out_lang=None, fetch_size=FETCH_SIZE):
+    conditions, params = [], []
+    if saved_only:
+        conditions.append("t.saved = 1")
+    if in_lang is not None:
+        conditions.append("t.input_lang = ?")
+        params.append(in_lang)
+    if out_lang is not None:
+        conditions.append("t.output_lang = ?")
+        params.append(out_lang)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""SELECT t.text, t.input_lang, t.output_lang, t.output, t.saved,
+                       (SELECT MAX(created_at) FROM history WHERE translation_id = t.id)
+                FROM translations t {where}
+                ORDER BY t.id"""
+    cur.execute(query, params)
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+# ----------------------------------- Запись -----------------------------------
+# Каждая функция записывает строки в открытый файл и возвращает их количество
+
+def write_csv(f, rows):
+    writer = csv.writer(f)
+    writer.writerow(COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(f, rows):
+    count = 0
+    for row in rows:
+        f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+# Текст сегмента TMX
+def xml_text(text):
+    return escape(INVALID_XML.sub("", text))
+
+
+# Время из БД ("2021-01-31 12:00:00") в формате TMX ("20210131T120000Z")
+def tmx_date(created_at):
+    return created_at.replace("-", "").replace(":", "").replace(" ", "T") + "Z"
+
+
+# TMX 1.4: одна единица перевода (tu) на каждый перевод, переводы без output пропускаются
+def write_tmx(f, rows):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<tmx version="1.4">\n')
+    f.write('  <header creationtool="Translator" creationtoolversion="1.0" datatype="plaintext"'
+            ' segtype="sentence" adminlang="en" srclang="*all*" o-tmf="Translator.db"/>\n')
+    f.write("  <body>\n")
+    count = 0
+    for text, in_lang, out_lang, output, saved, created_at in rows:
+        if output is None:
+            continue
+        attributes = f" creationdate={quoteattr(tmx_date(created_at))}" if created_at else ""
+        f.write(f"    <tu srclang={quoteattr(in_lang)}{attributes}>\n")
+        if saved:
+            f.write('      <prop type="x-saved">1</prop>\n')
+        f.write(f"      <tuv xml:lang={quoteattr(in_lang)}><seg>{xml_text(text)}</seg></tuv>\n")
+        f.write(f"      <tuv xml:lang={quoteattr(out_lang)}><seg>{xml_text(output)}</seg></tuv>\n")
+        f.write("    </tu>\n")
+        count += 1
+    f.write("  </body>\n")
+    f.write("</tmx>\n")
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "tmx": write_tmx}
+
+
+# ----------------------------------- Чтение -----------------------------------
+# Каждая функция читает файл по одной записи и возвращает
+# [text, input_lang, output_lang, output, saved] для каждого перевода
+
+# Код языка из файла ("en-US", "EN", "zh_CN") в формате приложения ("en", "zh-cn")
+@lru_cache(maxsize=None)
+def normalize_lang(lang):
+    lang = lang.strip().lower().replace("_", "-")
+    if lang.startswith("zh"):
+        return "zh-tw" if lang in ("zh-tw", "zh-hk", "zh-hant") else "zh-cn"
+    return lang.split("-")[0]
+
+
+def read_csv(path, in_lang=None, out_lang=None):
+    csv.field_size_limit(2 ** 31 - 1)  # Длинные тексты не помещаются в стандартный лимит
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        first = next(reader, [])
+        header = [name.strip().lower() for name in first]
+
+        # Файл с заголовком (например, выгруженный этой программой) или просто пары "текст, перевод"
+        if {"text", "output"} <= set(header):
+            columns = {name: header.index(name) for name in header}
+            text_column, output_column = columns["text"], columns["output"]
+        elif {"source", "target"} <= set(header):
+            columns = {name: header.index(name) for name in header}
+            text_column, output_column = columns["source"], columns["target"]
+        else:
+            columns = {}
+            text_column, output_column = 0, 1
+            reader = chain([first], reader)  # Первая строка - тоже перевод
+
+        # Пустая ячейка перевода - перевода нет (так выгружаются непереведенные записи истории)
+        for row in reader:
+            if len(row) <= max(text_column, output_column):
+                continue
+            yield [
+                row[text_column],
+                get_column(row, columns, "input_lang", in_lang),
+                get_column(row, columns, "output_lang", out_lang),
+                row[output_column] or None,
+                get_column(row, columns, "saved", "0") in ("1", "True", "true"),
+            ]
+
+
+# Значение колонки name, а если такой колонки нет - default
+def get_column(row, columns, name, default):
+    if name in columns and columns[name] < len(row) and row[columns[name]]:
+        return row[columns[name]]
+    return default
+
+
+def read_jsonl(path, in_lang=None, out_lang=None):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield [
+                item.get("text"),
+                item.get("input_lang") or in_lang,
+                item.get("output_lang") or out_lang,
+                item.get("output"),
+                bool(item.get("saved")),
+            ]
+
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+INLINE_CODES = {"bpt", "ept", "ph", "it", "ut"}  # Служебная разметка внутри сегмента TMX
+
+
+# Текст сегмента без служебной разметки
+def seg_text(element):
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag not in INLINE_CODES:
+            parts.append(seg_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+# TMX читается по одной единице перевода (tu), прочитанные элементы сразу удаляются из дерева.
+# Перевод ищется на язык out_lang, а если он не задан - берется другой язык из пары
+def read_tmx(path, in_lang=None, out_lang=None):
+    header_lang = None
+    body = None
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if element.tag == "header":
+                header_lang = element.get("srclang")
+            elif element.tag == "body":
+                body = element
+            continue
+        if element.tag != "tu":
+            continue
+
+        segments = {}
+        for tuv in element.iter("tuv"):
+            lang = tuv.get(XML_LANG) or tuv.get("lang")
+            seg = tuv.find("seg")
+            if lang and seg is not None:
+                segments.setdefault(normalize_lang(lang), seg_text(seg))
+        saved = any(prop.get("type") == "x-saved" and prop.text == "1" for prop in element.iter("prop"))
+        src = element.get("srclang") or header_lang
+        if body is not None:
+            body.clear()  # Освобождаем память, занятую прочитанными единицами перевода
+
+        source = in_lang or (normalize_lang(src) if src and src != "*all*" else None)
+        if source not in segments:
+            continue
+        targets = [lang for lang in segments if lang != source and (out_lang is None or lang == out_lang)]
+        for target in targets:
+            yield [segments[source], source, target, segments[target], saved]
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "tmx": read_tmx}
+
+
+# Делим записи на пачки по size штук
+def iter_batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            break
+        yield batch
+
+
+# Загружаем переводы из файла path в БД пачками по batch_size переводов, каждая пачка -
+# одна транзакция. Повторы (в файле и в БД) отсекаются по UNIQUE (text, input_lang, output_lang):
+# у уже известных переводов заполняется только отсутствующий перевод (или заменяется, если
+# overwrite=True). Если history=True, то импортированные переводы добавляются в историю.
+# Возвращаем статистику: прочитано, добавлено, обновлено, пропущено
+def import_translations(con, path, fmt=None, in_lang=None, out_lang=None, history=False,
+                        overwrite=False, batch_size=BATCH_SIZE):
+    fmt = fmt or get_format(path)
+    in_lang = normalize_lang(in_lang) if in_lang else None
+    out_lang = normalize_lang(out_lang) if out_lang else None
+    cur = con.cursor()
+
+    # Строка меняется, только если у нее действительно что-то изменится
+    if overwrite:
+        update = "output = excluded.output"
+        condition = "output IS NOT excluded.output"
+    else:
+        update = "output = COALESCE(output, excluded.output)"
+        condition = "output IS NULL"
+    upsert_query = f"""INSERT INTO translations(text, input_lang, output_lang, output, saved)
+                       VALUES(?, ?, ?, ?, ?)
+                       ON CONFLICT(text, input_lang, output_lang)
+                       DO UPDATE SET {update}, saved = MAX(saved, excluded.saved)
+                       WHERE {condition} OR excluded.saved > saved"""
+    history_query = """INSERT INTO history(translation_id)
+                       SELECT id FROM translations WHERE text=? AND input_lang=? AND output_lang=?"""
+
+    stats = Counter()
+    count_before = cur.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+    for batch in iter_batches(READERS[fmt](path, in_lang, out_lang), batch_size):
+        stats["read"] += len(batch)
+        rows = [
+            [text, normalize_lang(src), normalize_lang(dest), output, int(saved)]
+            for text, src, dest, output, saved in batch
+            if text and output is not None and src and dest
+        ]
+        stats["invalid"] += len(batch) - len(rows)
+
+        # Одна транзакция на пачку. BEGIN явно: иначе удаление триггера выполнится вне транзакции
+        cur.execute("BEGIN IMMEDIATE")
+        with con, Data_base.bulk_insert(cur):
+            cur.executemany(upsert_query, rows)
+            stats["changed"] += cur.rowcount
+            if history:
+                cur.executemany(history_query, [row[:3] for row in rows])
+
+    count_after = cur.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+    stats["inserted"] = count_after - count_before
+    stats["updated"] = stats.pop("changed", 0) - stats["inserted"]
+    stats["skipped"] = stats["read"] - stats["invalid"] - stats["inserted"] - stats["updated"]
+    return dict(stats)
+
+
+# Выгружаем переводы в файл path, формат по умолчанию определяется по расширению.
+# Возвращаем количество выгруженных переводов
+def export_translations(con, path, fmt=None, saved_only=False, in_lang=None, out_lang=None):
+    fmt = fmt or get_format(path)
+    rows = iter_translations(con.cursor(), saved_only, in_lang, out_lang)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return WRITERS[fmt](f, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт и импорт переводов БД переводчика")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="выгрузить переводы в CSV, JSONL или TMX")
+    export_parser.add_argument("path", help="файл для выгрузки (.csv, .jsonl или .tmx)")
+    export_parser.add_argument("-f", "--format", choices=FORMATS, help="формат файла (по умолчанию - по расширению)")
+    export_parser.add_argument("--saved", action="store_true", help="только \"сохраненные\" переводы")
+    export_parser.add_argument("-s", "--src", help="только переводы с этого языка")
+    export_parser.add_argument("-d", "--dest", help="только переводы на этот язык")
+    export_parser.add_argument("--db", default=Data_base.DB_NAME, help="БД с историей переводов")
+
+    import_parser = commands.add_parser("import", help="загрузить переводы из CSV, JSONL или TMX")
+    import_parser.add_argument("path", help="файл с переводами (.csv, .jsonl или .tmx)")
+    import_parser.add_argument("-f", "--format", choices=FORMATS, help="формат файла (по умолчанию - по расширению)")
+    import_parser.add_argument("-s", "--src", help="язык исходного текста (если его нет в файле)")
+    import_parser.add_argument("-d", "--dest", help="язык перевода (если его нет в файле; для TMX - какой язык брать)")
+    import_parser.add_argument("--history", action="store_true", help="добавить переводы в историю приложения")
+    import_parser.add_argument("--overwrite", action="store_true", help="заменять уже известные переводы")
+    import_parser.add_argument("--db", default=Data_base.DB_NAME, help="БД с историей переводов")
+    args = parser.parse_args(argv)
+
+    con = Data_base.connect(args.db)
+    Data_base.migrate(con)
+    try:
+        if args.command == "export":
+            count = export_translations(con, args.path, args.format, args.saved, args.src, args.dest)
+            print(f"Выгружено переводов: {count}", file=sys.stderr)
+        else:
+            started = time.monotonic()
+            stats = import_translations(con, args.path, args.format, args.src, args.dest,
+                                        args.history, args.overwrite)
+            print(f"Загружено за {time.monotonic() - started:.2f} с: {stats}", file=sys.stderr)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
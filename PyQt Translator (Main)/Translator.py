@@ -1,14 +1,18 @@
 try:
     import sys
     import os
-    import sqlite3  # Библиотека для работы с БД
 
-    from googletrans import Translator  # Библиотека для перевода текста
-    import pyttsx3  # Библиотека для произношения текста
-    import speech_recognition as sr  # Библиотека для распознавания голоса
+    # Замер времени запуска начинается до импорта остальных модулей
+    from Startup import StartupTimer, Lazy, warm_up  # Отложенная загрузка библиотек
+    startup = StartupTimer()
+
+    import importlib
+    import sqlite3  # Библиотека для работы с БД
+    import threading
 
     # Библиотеки для работы приложения
     from PyQt5 import uic, QtGui
+    from PyQt5.QtCore import Qt, QTimer, QSettings, pyqtSignal
     from PyQt5.QtGui import QIcon, QFont
     from PyQt5.QtWidgets import (
             QApplication,
@@ -16,13 +20,30 @@ try:
             QPushButton,
             QAction,
             QFileDialog,
-            QTableWidgetItem,
-            QTableWidget,
+            QTableView,
             QHeaderView,
             QMessageBox,
+            QInputDialog,
         )
 
     from Get_voices import Voices # Импортируем класс Voices из файла get_voices.py
+    from Translate_worker import TranslateWorker  # Фоновый перевод текста
+    from Speech_worker import SpeechWorker  # Воспроизведение текста в отдельном потоке
+    from Voice_input import VoiceInputWorker  # Голосовой ввод в отдельном потоке
+    from Speech_recognizers import SpeechRecognizers  # Способы распознавания речи (онлайн и офлайн)
+    from Audio_cache import AudioCache  # Кеш синтезированной речи на диске
+    import Audio_player  # Воспроизведение файлов из кеша речи
+    from Translate_backends import BACKENDS, googletrans, make_backend  # Сервисы перевода
+    from Saved_index import SavedIndex  # Состояние "сохранен ли перевод" в памяти
+    from Fuzzy_memory import FuzzyMemory, MIN_SIMILARITY  # Поиск похожих прошлых переводов
+    from History_model import TranslationsModel  # Модель таблиц с историей переводов
+    import Data_base  # Подключение к БД и обновление ее структуры
+    from Db_writer import DbWriter  # Запись в БД в отдельном потоке
+    import File_stream  # Потоковое чтение и запись файлов
+    import Translation_memory  # Экспорт и импорт переводов в CSV, JSONL и TMX
+
+    startup.mark("Модули импортированы")
+    googletrans.timer = startup
 
 except ImportError as e:
     print("Не найден модуль", e.name)
@@ -31,11 +52,17 @@ except ImportError as e:
 # Словарь с языками
 languages = {"Русский": "ru", "Английский": "en", "Японский": "ja", "Немецкий": "nl", "Китайский": "zh-cn"}
 
-# Словарь с голосами
-voices = Voices.get_voices()
+# Файл с настройками из меню Settings (лежит рядом с БД)
+SETTINGS_FILE = "Translator.ini"
+
+# Форматы файлов для экспорта переводов
+export_filters = {"CSV (*.csv)": "csv", "JSON Lines (*.jsonl)": "jsonl", "TMX (*.tmx)": "tmx"}
 
 
 class MyWidget(QMainWindow):
+    # Передает функцию из фонового потока (записи в БД, экспорта, импорта) в главный поток, где она и вызывается
+    db_written = pyqtSignal(object)
+
     ############№##=-  ИНИЦИАЛИЗАЦИЯ ПРИЛОЖЕНИЯ  -=###############
     def __init__(self):
         super().__init__()
@@ -43,31 +70,93 @@ class MyWidget(QMainWindow):
         self.windows_height = 510 # Высота окна по умолчанию
         self.history_width = 280 #  Ширина вкладки с историей переводов
 
-        uic.loadUi("translator.ui", self)  # Загружаем UI файл
+        with startup.phase("Загрузка интерфейса"):
+            uic.loadUi("translator.ui", self)  # Загружаем UI файл
         self.setFixedSize(self.windows_width, self.windows_height)  # Задаем фиксированный размер
         self.setWindowIcon(QtGui.QIcon("Icons/icon.png"))  # Загружаем иконку приложения
         self.setWindowTitle("Translator")  # Устанавливаем название окна
 
-        self.translator = Translator() # Инициализируем Переводчик
-        self.recognizer = (sr.Recognizer())  # Инициализируем библиотеку "speech_recognition"
-        self.engine = pyttsx3.init()  # Инициализируем библиотеку pyttsx3
-        self.end_loop = False # Закониоось ли воспроизвенение текста
+        # Настройки из меню Settings сохраняются между запусками
+        self.settings = QSettings(SETTINGS_FILE, QSettings.IniFormat)
+
+        self.max_symbols = 3100  # Максимальное количество символов в одном запросе к переводчику
+        # Переводчик, работающий в фоновом потоке. Более длинные тексты он переводит по частям
+        self.translate_worker = TranslateWorker(self, max_symbols=self.max_symbols, backend=self.load_backend())
+
+        # Библиотеки для голоса загружаются при первом использовании или в фоне после показа окна
+        self.speech_recognition = Lazy(  # Библиотека для распознавания голоса
+            "speech_recognition", lambda: importlib.import_module("speech_recognition"), startup
+        )
+        self.recognizer = Lazy("Recognizer", lambda: self.speech_recognition.get().Recognizer(), startup)
+        self.pyttsx3 = Lazy(  # Библиотека для произношения текста
+            "pyttsx3", lambda: importlib.import_module("pyttsx3"), startup
+        )
+        self.speech_worker = None  # Поток воспроизведения текста (создается после показа окна)
+        # Голосовой ввод в отдельном потоке, способ распознавания выбирается для каждого языка
+        self.recognizers = SpeechRecognizers()
+        self.voice_input_worker = VoiceInputWorker(
+            self.speech_recognition, self.recognizer, self.recognizers, parent=self
+        )
 
-        self.max_symbols = 3100  # Максимальное количество символов, которое доступно для перевода
-        self.can_translate = True  # Можно ли перевести текст
         self.fontSize_change_value = 800 # Когда поле ввода содержит более N символов, то мы меняем размер шрифта
         self.current_font = QFont() # Создаем переменную, внутри которой будем менять размер шрифта
 
+        self.live_translate = False  # Переводить ли текст во время ввода
+        # Через сколько мс после последнего изменения текста запускается перевод
+        self.live_delay = self.settings.value("live_delay", 600, type=int)
+        self.live_timer = QTimer(self)  # Таймер для отложенного перевода
+        self.live_timer.setSingleShot(True)
+        self.last_request = None  # Последние успешно переведенные данные
+        # Перевод во время ввода: (данные, перевод). В историю он попадает только после нажатия "перевести"
+        self.live_result = None
+        self.request_live = False  # Отправлен ли текущий запрос во время ввода
+        self.request_cacheable = True  # Можно ли записать в БД перевод текущего запроса
+
 
         self.is_history_open = False  # Открыта ли история переводов
         self.row, self.col = 0, 0  # Положение поля в таблицах с историей переводов по умолчанию
 
-        self.db_name = "Translator.db"  # Название БД с историей всех переводов
-        self.con = sqlite3.connect(self.db_name)  # Подключаемся к БД
-        self.cur = self.con.cursor()  # Создаем курсор для отправки запросов к БД
-
-        self.initUI()  # Функцию, отвечающая за все события
-        self.text_changed()  # Функция, устанавливающая значение в поле с кол-вом введенных символов
+        self.db_name = Data_base.DB_NAME  # Название БД с историей всех переводов
+        with startup.phase("Подключение к БД"):
+            self.con = Data_base.connect(self.db_name)  # Подключаемся к БД (WAL, ожидание блокировок)
+            self.cur = self.con.cursor()  # Создаем курсор для отправки запросов к БД
+            Data_base.migrate(self.con)  # Приводим старые версии БД к текущей схеме
+            # Все изменения БД выполняются в отдельном потоке, self.con используется только для чтения
+            # Если запись не удалась, сообщаем об этом в строке состояния
+            self.db_writer = DbWriter(self.db_name, on_error=lambda message: self.db_written.emit(
+                lambda: self.statusBar.showMessage(f"Не удалось сохранить в БД: {message}", 5000)
+            ))
+            self.db_written.connect(lambda callback: callback())
+
+        # Похожие прошлые переводы показываются сразу, пока идет запрос к переводчику.
+        # Если сходство не меньше fuzzy_skip (0 - выключено), то запрос не отправляется
+        self.fuzzy_memory = FuzzyMemory(self.db_name)
+        self.fuzzy_skip = self.settings.value("fuzzy_skip", 0, type=int)
+
+        with startup.phase("Загрузка сохраненных"):
+            self.saved_index = SavedIndex()  # Сохранен ли перевод (без запроса к БД)
+            self.saved_index.load(self.cur)
+
+        # Иконки кнопки "сохранить" загружаем один раз
+        self.star_icons = {
+            0: QIcon("Icons/star_inactive.png"),
+            1: QIcon("Icons/star_active.png"),
+        }
+
+        with startup.phase("Настройка интерфейса"):
+            self.initUI()  # Функцию, отвечающая за все события
+            self.text_changed()  # Функция, устанавливающая значение в поле с кол-вом введенных символов
+
+    # Окно показано: в фоне загружаем библиотеки, которые понадобятся позже,
+    # и после этого выводим время запуска
+    def on_shown(self):
+        startup.mark("Окно показано")
+        warm_up(
+            [googletrans, self.speech_recognition, self.recognizer, self.pyttsx3],
+            lambda: self.db_written.emit(lambda: print(startup.report(), "<---- Время запуска")),
+        )
+        self.get_speech_worker()  # Движок pyttsx3 и голоса создаются в потоке воспроизведения
+        self.fuzzy_memory.get_index(*self.get_data()[1:], wait=False)  # Индекс строится в фоне
 
     # Привязываем элементы приложения к функциямв
     def initUI(self):
@@ -81,12 +170,27 @@ class MyWidget(QMainWindow):
         # только в случае изменения текста
         self.inputText.textChanged.connect(self.text_changed)
 
+        # Перевод во время ввода: запускается, когда пользователь перестал печатать
+        self.live_timer.timeout.connect(self.live_translate_text)
+        self.inputLanguage.currentTextChanged.connect(self.schedule_live_translate)
+        self.outputLanguage.currentTextChanged.connect(self.schedule_live_translate)
+
         # ------------------- Кнопки ---------------------
         # ------------------------------------------------
 
         # Кнопка перевода
         self.pushButton.clicked.connect(self.translate)
 
+        # Результаты фонового перевода
+        self.translate_worker.finished.connect(
+            lambda data, output: self.on_translated(data, output, self.request_live, self.request_cacheable)
+        )
+        self.translate_worker.error.connect(self.on_translate_error)
+        self.translate_worker.busy_changed.connect(self.set_busy)
+        self.translate_worker.progress.connect(self.show_progress)
+        self.translate_worker.batch_finished.connect(self.on_batch_translated)
+        self.translate_worker.file_finished.connect(self.on_file_translated)
+
         # Кнопка перестановки полей
         self.switchButton.clicked.connect(self.switch_languages)
 
@@ -120,7 +224,12 @@ class MyWidget(QMainWindow):
             )
         )
 
-        # Кнопка голосового ввода
+        # Кнопка голосового ввода (повторное нажатие отменяет ввод)
+        self.voice_input_worker.state_changed.connect(self.on_voice_input_state)
+        self.voice_input_worker.recognized.connect(self.on_voice_recognized)
+        self.voice_input_worker.error.connect(
+            lambda message: self.statusBar.showMessage(f"Голосовой ввод: {message}", 5000)
+        )
         self.voiceInputButton.clicked.connect(
             lambda: self.voice_input(languages[self.inputLanguage.currentText()])
         )
@@ -137,12 +246,12 @@ class MyWidget(QMainWindow):
 
         # Кнопка выбора перевода из всей истории
         self.chooseFromHistory.clicked.connect(
-            lambda: self.set_data_from_widget(self.historyTableWidget)
+            lambda: self.set_data_from_widget(self.historyTableView)
         )
 
         # Кнопка выбора перевода из "сохраненных"
         self.chooseFromSaved.clicked.connect(
-            lambda: self.set_data_from_widget(self.savedTableWidget)
+            lambda: self.set_data_from_widget(self.savedTableView)
         )
 
         # --------------- Верхнее меню (Menu bar) -----------------
@@ -154,17 +263,101 @@ class MyWidget(QMainWindow):
         self.menuSave_file = QAction("Save", self)
         self.menuSave_file.triggered.connect(self.saveFile)
 
+        self.menuTranslate_file = QAction("Translate file...", self)
+        self.menuTranslate_file.triggered.connect(self.translateFile)
+
+        self.menuTranslate_history = QAction("Translate history", self)
+        self.menuTranslate_history.triggered.connect(self.translate_history)
+
+        self.menuExport_history = QAction("Export history...", self)
+        self.menuExport_history.triggered.connect(lambda: self.exportTranslations(saved_only=False))
+
+        self.menuExport_saved = QAction("Export saved...", self)
+        self.menuExport_saved.triggered.connect(lambda: self.exportTranslations(saved_only=True))
+
+        self.menuImport = QAction("Import translations...", self)
+        self.menuImport.triggered.connect(self.importTranslations)
+
         menubar = self.menuBar()
         self.fileMenu = menubar.addMenu("&File")
         self.fileMenu.addAction(self.menuOpen_file)
         self.fileMenu.addAction(self.menuSave_file)
+        self.fileMenu.addAction(self.menuTranslate_file)
+        self.fileMenu.addAction(self.menuTranslate_history)
+        self.fileMenu.addSeparator()
+        self.fileMenu.addAction(self.menuExport_history)
+        self.fileMenu.addAction(self.menuExport_saved)
+        self.fileMenu.addAction(self.menuImport)
+
+        self.menuLive_translate = QAction("Translate as you type", self, checkable=True)
+        self.menuLive_translate.toggled.connect(self.set_live_translate)
+        self.menuLive_translate.setChecked(self.settings.value("live_translate", False, type=bool))
+
+        self.menuLive_delay = QAction("Translate as you type delay...", self)
+        self.menuLive_delay.triggered.connect(self.change_live_delay)
+
+        self.menuSpeech_pause = QAction("Pause", self)
+        self.menuSpeech_pause.setShortcut("Ctrl+P")
+        self.menuSpeech_pause.triggered.connect(lambda: self.get_speech_worker().toggle_pause())
+
+        self.menuSpeech_skip = QAction("Skip", self)
+        self.menuSpeech_skip.setShortcut("Ctrl+N")
+        self.menuSpeech_skip.triggered.connect(lambda: self.get_speech_worker().skip())
+
+        self.menuSpeech_stop = QAction("Stop", self)
+        self.menuSpeech_stop.setShortcut("Esc")
+        self.menuSpeech_stop.triggered.connect(lambda: self.get_speech_worker().stop())
+
+        self.speechMenu = menubar.addMenu("S&peech")
+        self.speechMenu.addAction(self.menuSpeech_pause)
+        self.speechMenu.addAction(self.menuSpeech_skip)
+        self.speechMenu.addAction(self.menuSpeech_stop)
+
+        self.menuBackend = QAction("Translation service...", self)
+        self.menuBackend.triggered.connect(self.change_backend)
+
+        self.menuFuzzy = QAction("Translation memory...", self)
+        self.menuFuzzy.triggered.connect(self.change_fuzzy_skip)
+
+        self.menuRecognizer = QAction("Speech recognition...", self)
+        self.menuRecognizer.triggered.connect(self.change_recognizer)
+
+        self.settingsMenu = menubar.addMenu("&Settings")
+        self.settingsMenu.addAction(self.menuLive_translate)
+        self.settingsMenu.addAction(self.menuLive_delay)
+        self.settingsMenu.addAction(self.menuBackend)
+        self.settingsMenu.addAction(self.menuFuzzy)
+        self.settingsMenu.addAction(self.menuRecognizer)
 
         # ---------------- Таблицы (Table widgets) ----------------
         # ---------------------------------------------------------
 
-        # Привязываем функцию "cellClick" к Table widget`ам
-        self.historyTableWidget.cellClicked.connect(self.cellClick)
-        self.savedTableWidget.cellClicked.connect(self.cellClick)
+        # Модели таблиц: строки подгружаются из БД только при прокрутке
+        self.history_model = TranslationsModel(self.con, parent=self)
+        self.saved_model = TranslationsModel(self.con, saved_only=True, parent=self)
+
+        for view, model in [(self.historyTableView, self.history_model),
+                            (self.savedTableView, self.saved_model)]:
+            view.setModel(model)
+            view.setSelectionBehavior(QTableView.SelectRows)
+
+            # Меняем размеры столюцов для более удобного просмотра
+            header = view.horizontalHeader()
+            header.setSectionResizeMode(0, QHeaderView.Stretch)
+            header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+
+            # Привязываем функцию "cellClick" к таблицам
+            view.clicked.connect(lambda index: self.cellClick(index.row(), index.column()))
+
+        # Поиск по истории и по "сохраненным"
+        self.historySearch.textChanged.connect(
+            lambda text: self.search_translations(self.history_model, text)
+        )
+        self.savedSearch.textChanged.connect(
+            lambda text: self.search_translations(self.saved_model, text)
+        )
+        self.update_count_labels()
 
     ######################=-  ПОЛЕ ВВОДА  -=######################
 
@@ -172,8 +365,11 @@ class MyWidget(QMainWindow):
     def text_changed(self):
         try:
             text_len = len(self.inputText.toPlainText()) # Длинная текста, который ввел пользователь
-            # Выводим соотношение на экран
-            self.maxSymbols.setText(f"{text_len}/{self.max_symbols}")
+            # Выводим соотношение на экран. Более длинный текст будет переведен по частям
+            if text_len > self.max_symbols:
+                self.maxSymbols.setText(f"{text_len} (по частям)")
+            else:
+                self.maxSymbols.setText(f"{text_len}/{self.max_symbols}")
 
             if text_len == 0:
                 self.outputText.setPlainText("")
@@ -186,28 +382,118 @@ class MyWidget(QMainWindow):
             self.inputText.setFont(self.current_font)
             self.outputText.setFont(self.current_font)
 
-            # Проверяем, привышает ли длинна текста заданное число
-            # Если да, то блокируем функцию "translate"
-            if text_len > self.max_symbols:
-                self.can_translate = False
-            else:
-                self.can_translate = True
-
             self.switch_saveBtn_icon() # Если нужно, то меняем иконку кнопки
+            self.schedule_live_translate()  # Если включен перевод во время ввода, откладываем его
 
         except Exception as e:
             print(e, 1)
 
-    # Голосовой ввод
+    # Перезапускаем таймер перевода во время ввода
+    def schedule_live_translate(self):
+        if self.live_translate:
+            self.live_timer.start(self.live_delay)
+
+    # Пользователь перестал печатать: переводим, если текст изменился с прошлого перевода
+    def live_translate_text(self):
+        data = self.get_data()
+        if data[0].strip() and data != self.last_request:
+            self.translate(live=True)
+
+    # Включаем/выключаем перевод во время ввода
+    def set_live_translate(self, enabled):
+        self.live_translate = enabled
+        self.settings.setValue("live_translate", enabled)
+        if enabled:
+            self.schedule_live_translate()
+        else:
+            self.live_timer.stop()
+
+    # Меняем задержку перевода во время ввода
+    def change_live_delay(self):
+        delay, ok = QInputDialog.getInt(
+            self, "Перевод во время ввода", "Задержка (мс):", self.live_delay, 100, 5000, 100
+        )
+        if ok:
+            self.live_delay = delay
+            self.settings.setValue("live_delay", delay)
+
+    # Голосовой ввод: запись и распознавание идут в отдельном потоке.
+    # Повторное нажатие кнопки во время записи отменяет ввод
     def voice_input(self, language):
+        if self.voice_input_worker.is_busy():
+            self.voice_input_worker.cancel()
+            return
+        self.voice_input_worker.start(language)
+
+    # Показываем, что сейчас происходит с голосовым вводом
+    def on_voice_input_state(self, state):
+        messages = {
+            "calibrating": "Определение уровня шума...",
+            "listening": "Говорите... (нажмите еще раз, чтобы отменить)",
+            "recognizing": "Распознавание...",
+        }
+        if state in messages:
+            self.statusBar.showMessage(messages[state])
+        else:
+            self.statusBar.clearMessage()
+
+    # Речь распознана
+    def on_voice_recognized(self, text, latency, backend):
+        self.inputText.setPlainText(text)
+        self.statusBar.showMessage(f"Распознано за {latency:.2f} с ({backend})", 5000)
+
+    # Сервис перевода, выбранный при прошлом запуске (по умолчанию Google Translate)
+    def load_backend(self):
+        name = self.settings.value("backend", "google")
         try:
-            with sr.Microphone() as source:
-                lang = f"{language.upper()}-{language}"  # Переписываем переменную language в формат "XY-xy"
-                audio = self.recognizer.listen(source)  # Слушаем то что сказал пользователь
-                text = self.recognizer.recognize_google(audio, language=lang)  # Конвертируем в текст
-                self.inputText.setPlainText(text)
-        except Exception as e:
-            print(e, 4)
+            return make_backend(name, Data_base.DB_NAME, self.settings.value("backend_url") or None)
+        except ValueError as e:
+            print(e, "<---- Неверный сервис перевода в настройках")
+            return None
+
+    # Выбираем сервис перевода. "Память переводов" работает без сети,
+    # для HTTP-сервера спрашиваем его адрес
+    def change_backend(self):
+        backends = list(BACKENDS.values())
+        titles = [backend.title for backend in backends]
+        current = titles.index(self.translate_worker.client.backend.title)
+        title, ok = QInputDialog.getItem(self, "Сервис перевода", "Сервис:", titles, current, False)
+        if not ok:
+            return
+        name = backends[titles.index(title)].name
+
+        url = None
+        if name == "http":
+            url, ok = QInputDialog.getText(self, "Сервис перевода", "Адрес сервера:", text="http://127.0.0.1:5000")
+            if not ok or not url.strip():
+                return
+        url = url.strip() if url else None
+        self.translate_worker.set_backend(make_backend(name, self.db_name, url))
+        self.settings.setValue("backend", name)
+        self.settings.setValue("backend_url", url or "")
+        self.statusBar.showMessage(f"Сервис перевода: {title}", 5000)
+
+    # Меняем сходство, начиная с которого перевод похожего текста берется без запроса к переводчику
+    def change_fuzzy_skip(self):
+        value, ok = QInputDialog.getInt(
+            self, "Память переводов", "Не обращаться к переводчику при сходстве от (%, 0 - всегда):",
+            self.fuzzy_skip, 0, 100, 5
+        )
+        if ok:
+            self.fuzzy_skip = value
+            self.settings.setValue("fuzzy_skip", value)
+
+    # Выбираем способ распознавания речи для текущего языка ввода
+    def change_recognizer(self):
+        language = languages[self.inputLanguage.currentText()]
+        backends = self.recognizers.available(language)
+        titles = [backend.title for backend in backends]
+        current = titles.index(self.recognizers.get(language).title)
+        title, ok = QInputDialog.getItem(
+            self, "Распознавание речи", f"Язык: {self.inputLanguage.currentText()}", titles, current, False
+        )
+        if ok:
+            self.recognizers.select(language, backends[titles.index(title)].name)
 
     # Очистка обоих полей ввода
     def clear(self):
@@ -217,52 +503,281 @@ class MyWidget(QMainWindow):
 
     #######################=-  MENU BAR  -=#######################
 
-    # Открыть файл для перевода
+    # Открыть файл для перевода.
+    # Файл читается кусками (с определением кодировки) и добавляется в поле ввода по частям
     def openFile(self):
+        fname = QFileDialog.getOpenFileName(self, "Open file", "/home")[0]
+        if not fname:
+            return
+
         try:
-            fname = QFileDialog.getOpenFileName(self, "Open file", "/home")[0]
-            f = open(fname, "r")
-            with f:
-                data = f.read()
-                self.inputText.setPlainText(data)
-        except:
-            pass
-
-    # Сохранить перевеленный текст в текстовый файл
+            encoding = File_stream.detect_encoding(fname)
+            self.inputText.blockSignals(True)  # Не пересчитываем поле после каждого куска
+            self.inputText.clear()
+            cursor = self.inputText.textCursor()
+            for chunk in File_stream.read_text(fname, encoding):
+                cursor.insertText(chunk)
+            self.statusBar.showMessage(f"Открыт файл {fname} ({encoding})", 5000)
+        except (OSError, ValueError) as e:
+            print(e, "<---- Ошибка чтения файла")
+            self.statusBar.showMessage(f"Не удалось открыть файл: {e}", 5000)
+        finally:
+            self.inputText.blockSignals(False)
+            self.text_changed()
+
+    # Сохранить перевеленный текст в текстовый файл.
+    # Текст записывается по абзацам, без копирования всего документа в одну строку
     def saveFile(self):
+        fname = QFileDialog.getSaveFileName(self, "Save file", "/translate.txt")[0]
+        if not fname:
+            return
+
+        def get_blocks():
+            block = self.outputText.document().begin()
+            while block.isValid():
+                yield block.text()
+                block = block.next()
+                if block.isValid():
+                    yield "\n"
+
         try:
-            fname = QFileDialog.getSaveFileName(self, "Save file", "/translate.txt")[0]
-            f = open(fname, "tw")
-            with f:
-                f.write(self.outputText.toPlainText())
-        except:
-            pass
+            File_stream.write_text(fname, get_blocks())
+            self.statusBar.showMessage(f"Перевод сохранен в {fname}", 5000)
+        except (OSError, ValueError) as e:
+            print(e, "<---- Ошибка записи файла")
+            self.statusBar.showMessage(f"Не удалось сохранить файл: {e}", 5000)
+
+    # Перевести файл целиком: файл переводится в фоновом потоке по частям,
+    # перевод записывается в выходной файл по мере готовности
+    def translateFile(self):
+        fname = QFileDialog.getOpenFileName(self, "Translate file", "/home")[0]
+        if not fname:
+            return
+        out_lang = languages[self.outputLanguage.currentText()]
+        output_name = QFileDialog.getSaveFileName(
+            self, "Save translation", File_stream.get_output_path(fname, out_lang)
+        )[0]
+        if not output_name:
+            return
+
+        in_lang = languages[self.inputLanguage.currentText()]
+        self.statusBar.showMessage(f"Перевод файла {fname}...")
+        self.translate_worker.request_file(fname, output_name, in_lang, out_lang)
+
+    # Файл переведен
+    def on_file_translated(self, output_name):
+        self.statusBar.showMessage(f"Перевод сохранен в {output_name}", 5000)
+
+
+    # Выгрузить историю (или только "сохраненные") в CSV, JSONL или TMX.
+    # Выгрузка идет в отдельном потоке со своим соединением с БД
+    def exportTranslations(self, saved_only):
+        # Выгружаем все языковые пары или одну из тех, что есть в БД (по умолчанию - текущую)
+        query = "SELECT DISTINCT input_lang, output_lang FROM translations"
+        if saved_only:
+            query += " WHERE saved = 1"
+        pairs = sorted(self.cur.execute(query).fetchall())
+        names = {code: name for name, code in languages.items()}
+        titles = ["Все языки"] + [f"{names.get(in_lang, in_lang)} → {names.get(out_lang, out_lang)}"
+                                  for in_lang, out_lang in pairs]
+        current_pair = tuple(self.get_data()[1:])
+        current = pairs.index(current_pair) + 1 if current_pair in pairs else 0
+        title, ok = QInputDialog.getItem(self, "Export", "Языки:", titles, current, False)
+        if not ok:
+            return
+        in_lang, out_lang = (None, None) if titles.index(title) == 0 else pairs[titles.index(title) - 1]
+
+        fname, selected = QFileDialog.getSaveFileName(
+            self, "Export", "/translations.csv", ";;".join(export_filters)
+        )
+        if not fname:
+            return
+        fmt = export_filters.get(selected, "csv")
+        if os.path.splitext(fname)[1].lstrip(".").lower() in Translation_memory.FORMATS:
+            fmt = Translation_memory.get_format(fname)
+
+        def export():
+            try:
+                con = Data_base.connect(self.db_name)
+                try:
+                    count = Translation_memory.export_translations(
+                        con, fname, fmt, saved_only, in_lang, out_lang
+                    )
+                finally:
+                    con.close()
+                message = f"Выгружено переводов: {count}"
+            except (OSError, sqlite3.Error) as e:
+                print(e, "<---- Ошибка экспорта")
+                message = f"Не удалось выгрузить переводы: {e}"
+            self.db_written.emit(lambda: self.statusBar.showMessage(message, 5000))
+
+        self.statusBar.showMessage("Выгрузка переводов...")
+        threading.Thread(target=export, daemon=True).start()
+
+
+    # Загрузить переводы из TMX, CSV или JSONL в кеш переводов и историю.
+    # Импорт идет в отдельном потоке со своим соединением с БД
+    def importTranslations(self):
+        fname = QFileDialog.getOpenFileName(
+            self, "Import", "/home", "Translation memory (*.tmx *.csv *.jsonl)"
+        )[0]
+        if not fname:
+            return
+        # Для файлов без языков (CSV из двух колонок) берем текущие языки,
+        # из TMX загружаем все языковые пары
+        if fname.lower().endswith(".tmx"):
+            in_lang, out_lang = None, None
+        else:
+            in_lang, out_lang = self.get_data()[1:]
+
+        def import_file():
+            try:
+                con = Data_base.connect(self.db_name)
+                try:
+                    stats = Translation_memory.import_translations(
+                        con, fname, None, in_lang, out_lang, history=True
+                    )
+                finally:
+                    con.close()
+                message = (f"Загружено переводов: {stats['inserted']}, обновлено: {stats['updated']}, "
+                           f"пропущено: {stats['skipped'] + stats['invalid']}")
+            except Exception as e:
+                print(e, "<---- Ошибка импорта")
+                message = f"Не удалось загрузить переводы: {e}"
+            self.db_written.emit(lambda: self.on_translations_imported(message))
+
+        self.statusBar.showMessage("Загрузка переводов...")
+        threading.Thread(target=import_file, daemon=True).start()
+
+    # Импорт закончен: перечитываем состояние "сохраненных" и таблицы
+    def on_translations_imported(self, message):
+        self.saved_index.load(self.cur)
+        self.translate_worker.client.backend.reset()  # Словарь памяти переводов перечитается
+        self.fuzzy_memory.clear()  # Индекс похожих переводов построится заново
+        self.update_table_widgets()
+        self.switch_saveBtn_icon()
+        self.statusBar.showMessage(message, 5000)
 
 
     #####################=-  ОБЩИЕ КНОПКИ  -=#####################
     #############=-  (взаимодействие с обоими полями)  -=#############
 
-    # Перевод
-    def translate(self):
-        if self.can_translate:
-            in_text = self.inputText.toPlainText()  # Текст из поля ввода
-            in_lang = languages[self.inputLanguage.currentText()]  # Язык с которого переводим (ru/en/...)
-            out_lang = languages[self.outputLanguage.currentText()]  # Язык на который переводим (ru/en/...)
-            while True:
-                try:
-                    # Запрос к гугл переводчику и занесение текста в поле вывода
-                    # print(in_text, in_lang, out_lang, "<---- Входные данные для перевода")
-                    result = self.translator.translate(in_text, src=in_lang, dest=out_lang)
-                    self.outputText.setPlainText(result.text)
+    # Перевод. live=True - перевод во время ввода: он только показывается,
+    # в историю и БД не записывается
+    def translate(self, live=False):
+        in_text = self.inputText.toPlainText()  # Текст из поля ввода
+        in_lang = languages[self.inputLanguage.currentText()]  # Язык с которого переводим (ru/en/...)
+        out_lang = languages[self.outputLanguage.currentText()]  # Язык на который переводим (ru/en/...)
+
+        data = [in_text, in_lang, out_lang]
+        self.live_timer.stop()  # Отложенный перевод этого же текста уже не нужен
+        # Этот текст уже переведен во время ввода: записываем его перевод в историю
+        if not live and self.commit_live_result(data):
+            self.translate_worker.cancel()
+            return
+
+        # Если такой перевод уже есть в БД, то берем его оттуда, не обращаясь к сети
+        cached = self.get_cached_translation(data)
+        if cached is not None:
+            self.translate_worker.cancel()  # Более старый запрос нам уже не нужен
+            self.on_translated(data, cached, live)
+            return
+
+        # Похожий текст, который уже переводили. Пока индекс пары языков строится, похожих нет
+        # Если порог пропуска запроса ниже обычного порога сходства, то ищем и менее похожие тексты
+        min_similarity = min(MIN_SIMILARITY, self.fuzzy_skip / 100) if self.fuzzy_skip else MIN_SIMILARITY
+        matches = self.fuzzy_memory.search(data, min_similarity, limit=1, wait=False)
+        if matches and self.fuzzy_skip and matches[0][0] >= self.fuzzy_skip / 100:
+            # Перевод похожего текста не сохраняется в БД как перевод этого текста
+            self.translate_worker.cancel()
+            self.last_request = data
+            self.outputText.setPlainText(matches[0][2])
+            self.statusBar.showMessage(f"Перевод похожего текста ({matches[0][0]:.0%}): {matches[0][1]}", 5000)
+            return
+
+        # Запрос к гугл переводчику выполняется в фоновом потоке,
+        # результат придет в функцию "on_translated"
+        self.request_live = live
+        self.request_cacheable = self.translate_worker.client.backend.cacheable
+        self.translate_worker.request(data)
+        if matches:
+            self.statusBar.showMessage(f"Похожий перевод ({matches[0][0]:.0%}): {matches[0][2]}", 10000)
+
+    # Получили перевод (из БД или из фонового потока).
+    # cacheable=False - перевод по памяти переводов: он только показывается
+    def on_translated(self, data, output, live=False, cacheable=True):
+        self.outputText.setPlainText(output)
+        self.last_request = data
+        self.statusBar.clearMessage()  # Подсказка с похожим переводом больше не нужна
+        if not cacheable:
+            self.live_result = None
+            if not live:
+                self.statusBar.showMessage("Перевод по памяти переводов не сохраняется в историю", 5000)
+            return
+        if live:
+            self.live_result = (data, output)
+            return
+        self.live_result = None
+        self.fuzzy_memory.add(data, output)
+
+        # Сохраняем перевод в БД, после записи он добавится в таблицы
+        self.save_to_data_base(data, output)
+        self.switch_saveBtn_icon()
 
-                    # Сохраняем перевод в БД и обновляем виджеты
-                    self.save_to_data_base()
-                    self.update_table_widgets()
+    # Записываем в историю перевод, полученный во время ввода (если он относится к data)
+    def commit_live_result(self, data):
+        if self.live_result is None or self.live_result[0] != data:
+            return False
+        self.on_translated(*self.live_result)
+        return True
+
+    # Перевод записан в журнал истории под id event_id: добавляем его в таблицу истории
+    def on_translation_saved(self, event_id, previous_id, data):
+        self.history_model.translation_saved(event_id, previous_id, data)
+        self.update_count_labels()
+
+    # Перевод не удался
+    def on_translate_error(self, message):
+        self.statusBar.showMessage(f"Ошибка перевода: {message}", 5000)
+
+    # Показываем, сколько частей длинного текста уже переведено
+    def show_progress(self, done, total):
+        self.statusBar.showMessage(f"Перевод... {done}/{total}")
+
+    # Показываем, что идет перевод
+    def set_busy(self, busy):
+        if busy:
+            self.statusBar.showMessage("Перевод...")
+            self.outputText.viewport().setCursor(Qt.BusyCursor)
+        else:
+            self.statusBar.clearMessage()
+            self.outputText.viewport().unsetCursor()
+
+    # Переводим пачками все записи истории, для которых в БД еще нет перевода
+    # (например, сохраненные старыми версиями программы)
+    def translate_history(self):
+        backend = self.translate_worker.client.backend
+        if not backend.cacheable:
+            self.statusBar.showMessage(f"{backend.title}: переводы не записываются в историю", 5000)
+            return
+        query = """SELECT text, input_lang, output_lang FROM translations
+                   WHERE output IS NULL"""
+        items = self.cur.execute(query).fetchall()
+        if items:
+            self.statusBar.showMessage(f"Перевод истории: {len(items)} записей...")
+            self.translate_worker.request_batch(items)
+        else:
+            self.statusBar.showMessage("Вся история уже переведена", 5000)
 
-                    break
-                except Exception as e:
-                    self.translator = Translator()
-                    print(e, "<---- Ошибка")
+    # Получили переводы записей истории
+    def on_batch_translated(self, results):
+        query = """UPDATE translations SET output = ?
+                   WHERE text=? AND input_lang=? AND output_lang=?"""
+        self.db_writer.executemany(query, [[output, text, in_lang, out_lang]
+                                           for text, in_lang, out_lang, output in results])
+        for text, in_lang, out_lang, output in results:
+            self.fuzzy_memory.add([text, in_lang, out_lang], output)
+        self.statusBar.showMessage(f"Переведено записей истории: {len(results)}", 5000)
 
     # Перестановка полей местами
     def switch_languages(self):
@@ -282,46 +797,44 @@ class MyWidget(QMainWindow):
         except Exception as e:
             print(e, 2)
 
-    # Воспроизведение текста
+    # Воспроизведение текста: текст добавляется в очередь потока воспроизведения
     def speak(self, text, language):
         try:
-            # Завершение воспроизведения
-            def end_speaking():
-                self.engine.endLoop()
-                self.end_loop = False
-
-            # Срабатывает при запуске
-            def onStart(name):
-                pass
-
-            # Срабатывает постоянно до тех пор, пока не закнчится воспроизведение
-            def onWord(name, location, length):
-                if self.end_loop:
-                    end_speaking()
-
-            # Срабатывает при завершении воспроизведения
-            def onEnd(name, completed):
-                end_speaking()
-
-        except Exception as e:
-            print(e)
-
-        try:
-            # Привязываем функции к self.engine
-            self.engine.connect("started-utterance", onStart)
-            self.engine.connect("started-word", onWord)
-            self.engine.connect("finished-utterance", onEnd)
-
             # Устанавливаем язык, на которм будет воспроизводится текст
-            if language in voices:
-                self.engine.setProperty("voice", voices[language])
-            else:
-                self.engine.setProperty("voice", voices["ru"])
-            self.engine.say(text)  # Запрос на воспроизведение текста
-            self.engine.startLoop()  # Запуск воспроизведения
-
+            # (голос для него выбирает поток воспроизведения)
+            self.get_speech_worker().speak(text, language)
         except Exception as e:
-            self.end_loop = True
+            print(e, "<---- Ошибка воспроизведения")
+
+    # Поток воспроизведения создается в главном потоке (ему нужен родитель - окно),
+    # а движок pyttsx3 и список голосов создаются уже в самом потоке воспроизведения
+    def get_speech_worker(self):
+        if self.speech_worker is None:
+            try:
+                cache = AudioCache()
+            except OSError as e:
+                print(e, "<---- Кеш речи недоступен")
+                cache = None
+            self.speech_worker = SpeechWorker(
+                lambda: self.pyttsx3.get().init(), startup, self, cache, Audio_player.get_player(),
+                lambda engine: Voices.get_voices(engine=engine),
+            )
+            self.speech_worker.state_changed.connect(self.on_speech_state)
+            self.speech_worker.progress.connect(
+                lambda done, total: self.statusBar.showMessage(f"Воспроизведение... {done}/{total}")
+            )
+            self.speech_worker.error.connect(
+                lambda message: self.statusBar.showMessage(f"Ошибка воспроизведения: {message}", 5000)
+            )
+        return self.speech_worker
+
+    # Меняем надпись паузы и строку состояния
+    def on_speech_state(self, state):
+        self.menuSpeech_pause.setText("Resume" if state == "paused" else "Pause")
+        if state == "paused":
+            self.statusBar.showMessage("Воспроизведение на паузе")
+        elif state == "idle":
+            self.statusBar.clearMessage()
 
 
     #####################=-  ПОЛЕ ВЫВОДА  -=#####################
@@ -345,79 +858,78 @@ class MyWidget(QMainWindow):
         ]
         return data
 
-    # Сохранение перевода в базу данных
-    def save_to_data_base(self):
-        data = self.get_data()
-
-        isSaved_query = """SELECT saved FROM translations
-                   WHERE text=? AND input_lang=? AND output_lang=?"""
-        # Получаем значение поля saved для данного перевода
-        saved = self.cur.execute(isSaved_query, data).fetchone()
+    # Получаем уже сохраненный в БД перевод (или None, если его нет)
+    def get_cached_translation(self, data):
+        return Data_base.get_translation(self.cur, data)
 
-        # Прооверяем, содержиться ли такой перевод в БД.
-        # Если да, то переписываем его с текущим значением парметра "saved".
-        # Если нет, то просто добавляем его в БД со значением saved = 0
-
-        if saved is not None:
-            query = f"""INSERT INTO translations(text, input_lang, output_lang, saved)
-                        VALUES(?, ?, ?, ?)"""
-            data.append(saved[0])
-        else:
-            query = f"""INSERT INTO translations(text, input_lang, output_lang)
-                        VALUES(?, ?, ?)"""
-
-        self.cur.execute(query, data)
-        self.con.commit()
+    # Сохранение перевода в базу данных
+    # Выполняем func(cursor) в потоке записи, затем callback(результат) - в главном потоке
+    def write_to_data_base(self, func, callback=None):
+        on_done = None
+        if callback is not None:
+            on_done = lambda result: self.db_written.emit(lambda: callback(result))
+        self.db_writer.submit(func, on_done)
+
+    def save_to_data_base(self, data, output):
+        data = list(data)
+
+        # Если такого перевода нет в БД, то он добавится со значением saved = 0
+        if self.saved_index.get(data) is None:
+            self.saved_index.set(data, 0)
+
+        # Сохраняем перевод и добавляем запись в журнал истории.
+        # После записи передаем в таблицы id новой и предыдущей записи журнала
+        self.write_to_data_base(
+            lambda cur: Data_base.save_translation(cur, data, output),
+            lambda ids: self.on_translation_saved(*ids, data),
+        )
 
     # Меняем иконку кнопки "добавить в сохраненные"
     def switch_saveBtn_icon(self):
-        data = self.get_data()
-        query = """SELECT saved FROM translations
-                   WHERE text=? AND input_lang=? AND output_lang=?"""
-        # Возвращает значение поля saved для данного перевода
-        result = self.cur.execute(query, data).fetchone()
-
-        # Существует ли такое перевод в БД
-        if result is not None:
-            is_saved = result[0]
-            # Если существует, и saved = 1, то меням иконку на "active"
-            if is_saved == 1:
-                self.saveButton.setIcon(QIcon("icons/star_active.png"))
-            # Если существует, и saved = 0, то меням иконку на "inactive"
-            else:
-                self.saveButton.setIcon(QIcon("icons/star_inactive.png"))
-        # Если не существует, то меням иконку на "inactive"
-        else:
-            self.saveButton.setIcon(QIcon("icons/star_inactive.png"))
+        # Значение поля saved для данного перевода берем из памяти.
+        # Если перевод сохранен, то иконка "active", иначе (или если перевода нет в БД) "inactive"
+        is_saved = self.saved_index.get(self.get_data())
+        self.saveButton.setIcon(self.star_icons[1 if is_saved == 1 else 0])
 
     # Добавление перевода в "сохраненные"
     def save_translation(self):
         try:
             data = self.get_data()
-            query = """SELECT id, saved FROM translations
-                       WHERE text=? AND input_lang=? AND output_lang=?"""
 
-            # Возвращает id и saved для данного перевода
-            id, result = self.cur.execute(query, data).fetchone()
+            # Значение saved для данного перевода (None, если перевода еще нет в БД)
+            result = self.saved_index.get(data)
+            if result is None and self.commit_live_result(data):
+                result = 0  # Перевод во время ввода только что записан в БД
+            if result is None:
+                return
             # Узнаем на какое значение нужно изменить поле saved
             if result == 0:
                 saved = 1
             else:
                 saved = 0
 
-            # Меняем значения
-            set_saved_query = f"""UPDATE translations
-                                  SET saved = {saved}
-                                  WHERE id = {id}"""
+            # Меняем значения и узнаем id перевода
+            def set_saved(cur):
+                set_saved_query = """UPDATE translations
+                                     SET saved = ?
+                                     WHERE text=? AND input_lang=? AND output_lang=?"""
+                cur.execute(set_saved_query, [saved] + data)
+                id_query = """SELECT id FROM translations
+                              WHERE text=? AND input_lang=? AND output_lang=?"""
+                return cur.execute(id_query, data).fetchone()[0]
 
-            self.cur.execute(set_saved_query)
-            self.con.commit()
+            self.saved_index.set(data, saved)
+            self.write_to_data_base(set_saved, lambda id: self.on_saved_changed(id, data, saved))
 
-            # Сохраняем меняем иконку на кнопке "сохранить" и обновляем виджеты
+            # Сохраняем меняем иконку на кнопке "сохранить"
             self.switch_saveBtn_icon()
-            self.update_table_widgets()
-        except:
-            pass
+        except Exception as e:
+            print(e)
+
+    # Значение saved записано в БД: обновляем таблицу "сохраненных"
+    def on_saved_changed(self, id, data, saved):
+        self.saved_model.saved_changed(id, data, saved)
+        self.update_count_labels()
 
     # Разворачиваем историю переводов
     def show_history(self):
@@ -430,65 +942,31 @@ class MyWidget(QMainWindow):
             self.setFixedSize(self.windows_width, self.windows_height)
             self.historyButton.setIcon(QIcon('Icons/history_inactive.png'))
             self.is_history_open = False
-        self.update_table_widgets()
 
-    # Обновляем данные, которые выводятся в виджеты
+    # Полностью перечитываем данные, которые выводятся в виджеты
     def update_table_widgets(self):
         try:
-            # -------------------------------------------------------------------------------------------
-            # ----------------------------------- Все переводы ------------------------------------------
-
-            # Выводим всю историю из БД на виджет
-            history_query = """SELECT text, input_lang, output_lang FROM translations
-                               ORDER BY id"""
-            history_result = self.cur.execute(history_query).fetchall()
-
-            self.historyCountLabel.setText(f"Переводов: {len(history_result)}")
-
-            self.historyTableWidget.setColumnCount(3)
-            self.historyTableWidget.setRowCount(0)
-
-            # Меняем размеры столюцов для более удобного просмотра
-            header = self.historyTableWidget.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.Stretch)
-            header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-
-            # Заполняем таблицу элементами
-            for i, row in enumerate(history_result):
-                self.historyTableWidget.setRowCount(
-                    self.historyTableWidget.rowCount() + 1
-                )
-                for j, elem in enumerate(row):
-                    self.historyTableWidget.setItem(i, j, QTableWidgetItem(str(elem)))
-            # -------------------------------------------------------------------------------------------
-            # -------------------------------- "Сохраненные" переводы -----------------------------------
-
-            # Выводим из БД только сохраненные переводы на виджет
-            saved_query = """SELECT text, input_lang, output_lang FROM translations
-                             WHERE saved = 1
-                             ORDER BY id"""
-            saved_result = self.cur.execute(saved_query).fetchall()
-
-            self.savedCountLabel.setText(f"Переводов: {len(saved_result)}")
-
-            self.savedTableWidget.setColumnCount(3)
-            self.savedTableWidget.setRowCount(0)
-
-            # Меняем размеры столюцов для более удобного просмотра
-            header = self.savedTableWidget.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.Stretch)
-            header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-
-            # Заполняем таблицу элементами
-            for i, row in enumerate(saved_result):
-                self.savedTableWidget.setRowCount(self.savedTableWidget.rowCount() + 1)
-                for j, elem in enumerate(row):
-                    self.savedTableWidget.setItem(i, j, QTableWidgetItem(str(elem)))
+            # Модели перечитывают только количество строк,
+            # сами строки загружаются при отображении и прокрутке таблиц
+            self.history_model.refresh()
+            self.saved_model.refresh()
+            self.update_count_labels()
         except Exception as e:
             print(e, 5)
 
+    # Фильтруем таблицу по поисковому запросу
+    def search_translations(self, model, text):
+        try:
+            model.set_search(text)
+        except sqlite3.OperationalError as e:
+            print(e, "<---- Ошибка поиска")
+        self.update_count_labels()
+
+    # Выводим количество переводов в истории и в "сохраненных"
+    def update_count_labels(self):
+        self.historyCountLabel.setText(f"Переводов: {self.history_model.total}")
+        self.savedCountLabel.setText(f"Переводов: {self.saved_model.total}")
+
     # Окно подтверждения и удаления соответственно
     def showDeleteDialog(self, what_delete: str):
         try:
@@ -500,20 +978,27 @@ class MyWidget(QMainWindow):
 
             returnValue = messageBox.exec()
             if returnValue == QMessageBox.Ok:
-                # Если удаляем историю:
+                # Если удаляем историю (удаляются все переводы, записи журнала истории - вместе с ними):
                 if what_delete == "history":
-                    query = """DELETE * FROM translations"""
+                    queries = ["""DELETE FROM translations"""]
+                    self.saved_index.clear()
+                    self.history_model.clear()
+                    self.saved_model.clear()
                 # Если удаляем созраненные:
                 else:
-                    query = """UPDATE translations
-                               SET saved = 0
-                               WHERE saved = 1"""
-
-                self.cur.execute(query)
-                self.con.commit()
-
-                # Сохраняем меняем иконку на кнопке "сохранить" и обновляем виджеты
-                self.update_table_widgets()
+                    queries = ["""UPDATE translations
+                                  SET saved = 0
+                                  WHERE saved = 1"""]
+                    self.saved_index.clear_saved()
+                    self.saved_model.clear()
+
+                for query in queries:
+                    self.db_writer.execute(query)
+                # После удаления индекс похожих переводов построится заново
+                self.db_writer.submit(lambda cur: None, lambda result: self.fuzzy_memory.clear())
+
+                # Сохраняем меняем иконку на кнопке "сохранить" и обновляем счетчики
+                self.update_count_labels()
                 self.switch_saveBtn_icon()
 
         except Exception as e:
@@ -525,17 +1010,17 @@ class MyWidget(QMainWindow):
         self.col = col
 
     # Устанавливает выбранный из истории или "сохраненных" перевод в соответствующие поля
-    def set_data_from_widget(self, widget: QTableWidget, cols=3):
+    def set_data_from_widget(self, widget: QTableView):
         # Функция для получения ключа из словаря languages
         def get_key(item):
             for i in languages:
                 if languages[i] == item:
                     return i
 
-        # Формируем массив с данными из выбранного поля виджета
-        data = []
-        for col in range(cols):
-            data.append(widget.item(self.row, col).text())
+        # Получаем из БД данные выбранной строки таблицы
+        data = widget.model().get_row(self.row)
+        if data is None:
+            return
 
         text, input_lang, output_lang = data
         self.inputText.setPlainText(text)
@@ -548,6 +1033,15 @@ class MyWidget(QMainWindow):
 
     # Функция, вызываемая при закрытии приложения
     def closeEvent(self, event):
+        self.translate_worker.shutdown()  # Останавливаем фоновый перевод
+        self.voice_input_worker.cancel()  # Результат голосового ввода уже не нужен
+        if self.speech_worker is not None:
+            self.speech_worker.close()  # Останавливаем воспроизведение
+            if self.speech_worker.cache is not None:
+                print(self.speech_worker.cache.get_stats(), "<---- Статистика кеша речи")
+        print(self.translate_worker.retry_policy.get_stats(), "<---- Статистика запросов")
+        self.db_writer.close()  # Дописываем в БД все, что осталось в очереди
+        print(self.db_writer.get_stats(), "<---- Статистика записи в БД")
         self.con.close()  # Отключаем соединение с БД
 
 
@@ -555,4 +1049,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     ex = MyWidget()
     ex.show()
+    QTimer.singleShot(0, ex.on_shown)  # Срабатывает, когда окно уже отрисовано
     sys.exit(app.exec_())
@@ -0,0 +1,113 @@
+""" Голосовой ввод в отдельном потоке: окно не зависает, пока пользователь говорит
+    и пока идет запрос к сервису распознавания """
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class VoiceInputWorker(QObject):
+    state_changed = pyqtSignal(str)  # "calibrating", "listening", "recognizing" или "idle"
+    # (распознанный текст, время распознавания в секундах, способ распознавания)
+    recognized = pyqtSignal(str, float, str)
+    error = pyqtSignal(str)
+
+    # speech_recognition и recognizer - объекты Lazy (библиотека и Recognizer загружаются в фоне),
+    # recognizers - SpeechRecognizers (способ распознавания для каждого языка)
+    def __init__(self, speech_recognition, recognizer, recognizers, timeout=5, phrase_time_limit=15,
+                 calibration_time=0.5, parent=None):
+        super().__init__(parent)
+        self.speech_recognition = speech_recognition
+        self.recognizer = recognizer
+        self.recognizers = recognizers
+        self.timeout = timeout  # Сколько секунд ждать начала речи
+        self.phrase_time_limit = phrase_time_limit  # Максимальная длина фразы в секундах
+        self.calibration_time = calibration_time  # Сколько секунд слушать фоновый шум
+        self.calibrated = False  # Порог шума определяется один раз и хранится в Recognizer
+        self.thread = None
+        self.cancel_event = None
+
+    def is_busy(self):
+        return self.cancel_event is not None and not self.cancel_event.is_set()
+
+    # Начинаем слушать микрофон. language - код языка ("ru", "en", ...)
+    def start(self, language):
+        if self.is_busy():
+            return
+        if self.thread is not None and self.thread.is_alive():
+            # Отмененная запись еще не закончилась: микрофон занят
+            self.error.emit("Предыдущая запись еще не завершена")
+            return
+
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(language, self.cancel_event), daemon=True)
+        self.thread.start()
+
+    # Отмена: запись (не дольше timeout + phrase_time_limit) доигрывается в потоке,
+    # но ее результат не распознается и не выводится
+    def cancel(self):
+        if self.is_busy():
+            self.cancel_event.set()
+            self.state_changed.emit("idle")
+
+    def set_state(self, state, cancel_event):
+        if not cancel_event.is_set():
+            self.state_changed.emit(state)
+
+    def run(self, language, cancel_event):
+        try:
+            result = self.capture(language, cancel_event)
+        except Exception as e:
+            result = e
+        if cancel_event.is_set():
+            return  # Ввод отменен, состояние "idle" уже отправлено
+
+        cancel_event.set()
+        self.state_changed.emit("idle")
+        if isinstance(result, Exception):
+            print(result, "<---- Ошибка голосового ввода")
+            self.error.emit(self.describe_error(result))
+        elif result is not None:
+            self.recognized.emit(*result)
+
+    # Записываем фразу и распознаем ее.
+    # Возвращаем (текст, время распознавания, способ распознавания) или None при отмене
+    def capture(self, language, cancel_event):
+        sr = self.speech_recognition.get()
+        recognizer = self.recognizer.get()
+
+        with sr.Microphone() as source:
+            # Уровень фонового шума определяем только при первой записи
+            if not self.calibrated:
+                self.set_state("calibrating", cancel_event)
+                recognizer.adjust_for_ambient_noise(source, duration=self.calibration_time)
+                self.calibrated = True
+            if cancel_event.is_set():
+                return None
+
+            self.set_state("listening", cancel_event)
+            audio = recognizer.listen(
+                source, timeout=self.timeout, phrase_time_limit=self.phrase_time_limit
+            )
+        if cancel_event.is_set():
+            return None
+
+        self.set_state("recognizing", cancel_event)
+        backend = self.recognizers.get(language)
+        start = time.perf_counter()
+        text = backend.recognize(recognizer, audio, language)
+        return text, time.perf_counter() - start, backend.title
+
+    # Понятное пользователю описание ошибки
+    def describe_error(self, e):
+        if not self.speech_recognition.is_loaded():
+            return str(e)  # Библиотека не загрузилась
+        sr = self.speech_recognition.get()
+        if isinstance(e, sr.WaitTimeoutError):
+            return "Речь не услышана"
+        if isinstance(e, sr.UnknownValueError):
+            return "Речь не распознана"
+        if isinstance(e, sr.RequestError):
+            return f"Сервис распознавания недоступен: {e}"
+        return str(e)
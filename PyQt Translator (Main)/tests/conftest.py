@@ -0,0 +1,6 @@
+""" Модули приложения лежат в родительской папке и импортируются по имени (import Data_base) """
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+""" Несколько процессов одновременно открывают одну БД, пишут в нее и ищут по полнотекстовому индексу """
+
+import multiprocessing
+import sqlite3
+
+import Data_base
+
+WRITERS = 4
+READERS = 2
+ITERATIONS = 150
+COMMON = 10  # Общие для всех процессов тексты (проверяем UPSERT при одновременной записи)
+
+
+# Каждый процесс сам создает или обновляет структуру БД: все стартуют одновременно
+def open_db(path, start):
+    start.wait()
+    con = Data_base.connect(path)
+    Data_base.migrate(con)
+    return con
+
+
+def writer(path, number, start, errors):
+    try:
+        con = open_db(path, start)
+        cur = con.cursor()
+        for i in range(ITERATIONS):
+            Data_base.save_translation(cur, [f"writer{number} text {i}", "ru", "en"], f"output {i}")
+            Data_base.save_translation(cur, [f"common {i % COMMON}", "ru", "en"], f"common output {i}")
+            con.commit()
+        con.close()
+    except sqlite3.Error as e:
+        errors.put(f"writer{number}: {e}")
+
+
+def reader(path, number, start, done, errors):
+    try:
+        con = open_db(path, start)
+        while not done.is_set():
+            con.execute("SELECT COUNT(*) FROM translations_fts WHERE translations_fts MATCH 'text'").fetchone()
+            con.execute("SELECT COUNT(*) FROM history").fetchone()
+        con.close()
+    except sqlite3.Error as e:
+        errors.put(f"reader{number}: {e}")
+
+
+def test_processes_share_database(tmp_path):
+    path = str(tmp_path / "Translator.db")
+    context = multiprocessing.get_context("spawn")
+    start, done = context.Event(), context.Event()
+    errors = context.Queue()
+
+    writers = [context.Process(target=writer, args=(path, n, start, errors)) for n in range(WRITERS)]
+    readers = [context.Process(target=reader, args=(path, n, start, done, errors)) for n in range(READERS)]
+    for process in writers + readers:
+        process.start()
+    start.set()
+
+    for process in writers:
+        process.join(60)
+    done.set()
+    for process in readers:
+        process.join(60)
+
+    messages = []
+    while not errors.empty():
+        messages.append(errors.get())
+    assert not messages, messages
+    assert all(process.exitcode == 0 for process in writers + readers)
+
+    con = Data_base.connect(path)
+    count = lambda query: con.execute(query).fetchone()[0]
+    assert count("SELECT COUNT(*) FROM translations") == WRITERS * ITERATIONS + COMMON
+    assert count("SELECT COUNT(*) FROM history") == 2 * WRITERS * ITERATIONS
+    assert count("SELECT COUNT(*) FROM translations_fts WHERE translations_fts MATCH 'text'") == WRITERS * ITERATIONS
+    assert count("SELECT COUNT(*) FROM translations_fts WHERE translations_fts MATCH 'common'") == COMMON
+    con.close()
@@ -0,0 +1,83 @@
+""" Поиск похожих переводов: индекс должен находить то же, что и сравнение запроса с каждым текстом """
+
+import random
+import threading
+
+import Data_base
+from Fuzzy_memory import FuzzyMemory, NgramIndex, make_ngrams, similarity
+
+TEXTS = 500
+QUERIES = 200
+WORDS = ["кот", "кошка", "дом", "сад", "идет", "спит", "большой", "зеленый", "в", "на", "и", "Hello", "world"]
+
+
+def random_text(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+
+
+# Запрос - один из текстов с измененным, добавленным или удаленным словом (или совсем новый текст)
+def random_query(rng, texts):
+    words = rng.choice(texts).split()
+    action = rng.randrange(4)
+    if action == 0:
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    elif action == 1:
+        words.insert(rng.randint(0, len(words)), rng.choice(WORDS))
+    elif action == 2 and len(words) > 1:
+        del words[rng.randrange(len(words))]
+    elif action == 3:
+        return random_text(rng)
+    return " ".join(words)
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(1)
+    texts = list({random_text(rng) for _ in range(TEXTS)})
+    index = NgramIndex()
+    for text in texts:
+        index.add(text, text.upper())
+
+    for _ in range(QUERIES):
+        query = random_query(rng, texts)
+        min_similarity = rng.choice([0.3, 0.5, 0.7, 0.9])
+        ngrams = make_ngrams(query)
+        expected = {}
+        for text in texts:
+            score = similarity(ngrams, make_ngrams(text))
+            if score >= min_similarity:
+                expected[text] = score
+
+        found = index.search(query, min_similarity, limit=len(texts))
+        assert {text: score for score, text, output in found} == expected, query
+        assert [score for score, text, output in found] == sorted(expected.values(), reverse=True)
+
+
+# Индекс, который строился во время очистки памяти, не сохраняется: его построят заново по новым данным
+def test_clear_discards_stale_index(tmp_path):
+    path = str(tmp_path / "Translator.db")
+    con = Data_base.connect(path)
+    Data_base.migrate(con)
+    Data_base.save_translation(con.cursor(), ["старый текст", "ru", "en"], "old text")
+    con.commit()
+
+    memory = FuzzyMemory(path)
+    started, cleared = threading.Event(), threading.Event()
+    build = memory.build
+
+    def slow_build(in_lang, out_lang):
+        index = build(in_lang, out_lang)
+        started.set()
+        cleared.wait(5)
+        return index
+
+    memory.build = slow_build
+    assert memory.get_index("ru", "en", wait=False) is None
+    started.wait(5)
+    con.execute("DELETE FROM translations")
+    Data_base.save_translation(con.cursor(), ["новый текст", "ru", "en"], "new text")
+    con.commit()
+    con.close()
+    memory.clear()
+    cleared.set()
+
+    assert [text for score, text, output in memory.search(["новый текст", "ru", "en"], 0.3)] == ["новый текст"]
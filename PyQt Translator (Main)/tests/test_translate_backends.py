@@ -0,0 +1,54 @@
+""" Сервисы перевода: HTTP-сервер, который часто отвечает ошибкой, и память переводов из БД """
+
+from concurrent.futures import ThreadPoolExecutor
+
+import Data_base
+from Fake_translate_server import FakeTranslateServer, fake_translate
+from Retry_policy import CircuitBreaker, RetryPolicy
+from Translate_backends import HttpBackend, MemoryBackend
+from Translate_client import TranslateClient
+
+THREADS = 8
+REQUESTS = 200
+ERROR_RATE = 0.2  # Каждый пятый ответ сервера - ошибка 503
+
+
+# Одновременные запросы через TranslateClient: все ошибки сервера должны закрываться повторами
+def test_http_backend_retries_server_errors():
+    server = FakeTranslateServer(error_rate=ERROR_RATE, seed=1)
+    url = server.start()
+    try:
+        # Предохранитель не должен размыкаться от нескольких случайных ошибок подряд
+        retry_policy = RetryPolicy(max_attempts=10, base_delay=0.01, max_delay=0.05,
+                                   breaker=CircuitBreaker(failure_threshold=REQUESTS))
+        client = TranslateClient(retry_policy, HttpBackend(url))
+        texts = [f"Строка {i}\nвторая строка" for i in range(REQUESTS)]
+
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            outputs = list(executor.map(lambda text: client.translate(text, "ru", "en"), texts))
+    finally:
+        server.stop()
+
+    assert outputs == [fake_translate(text, "ru", "en") for text in texts]
+    stats = retry_policy.get_stats()
+    assert stats["successes"] == REQUESTS
+    assert "failures" not in stats
+    assert stats["retries"] == server.get_stats()["errors"] > 0
+
+
+def test_memory_backend_translates_from_database(tmp_path):
+    path = str(tmp_path / "Translator.db")
+    con = Data_base.connect(path)
+    Data_base.migrate(con)
+    cur = con.cursor()
+    Data_base.save_translation(cur, ["Добрый день", "ru", "en"], "Good afternoon")
+    Data_base.save_translation(cur, ["кот", "ru", "en"], "cat")
+    Data_base.save_translation(cur, ["спит", "ru", "en"], "sleeps")
+    con.commit()
+    con.close()
+
+    backend = MemoryBackend(path)
+    # Строка целиком, затем по словам; неизвестные слова и пустые строки остаются как есть
+    assert backend.translate("Добрый день", "ru", "en") == "Good afternoon"
+    assert backend.translate("Добрый день\n\nКот спит дома", "ru", "en") == "Good afternoon\n\nCat sleeps дома"
+    assert not backend.cacheable
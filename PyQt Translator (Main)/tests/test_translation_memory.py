@@ -0,0 +1,45 @@
+""" Выгрузка переводов в файл и загрузка обратно """
+
+import Data_base
+import Translation_memory
+
+
+def make_db(path):
+    con = Data_base.connect(path)
+    Data_base.migrate(con)
+    return con
+
+
+# Непереведенные записи выгружаются в CSV с пустым переводом и при загрузке не становятся переводом ""
+def test_csv_round_trip_keeps_untranslated_rows_missing(tmp_path):
+    con = make_db(str(tmp_path / "source.db"))
+    cur = con.cursor()
+    Data_base.save_translation(cur, ["Привет", "ru", "en"], "Hello")
+    Data_base.save_translation(cur, ["Пока", "ru", "en"], "Bye")
+    cur.execute("UPDATE translations SET saved = 1 WHERE text = 'Пока'")
+    cur.execute("INSERT INTO translations(text, input_lang, output_lang) VALUES('Старая запись', 'ru', 'en')")
+    con.commit()
+    path = str(tmp_path / "translations.csv")
+    assert Translation_memory.export_translations(con, path) == 3
+    con.close()
+
+    con = make_db(str(tmp_path / "target.db"))
+    stats = Translation_memory.import_translations(con, path)
+    assert stats["read"] == 3
+    assert stats["inserted"] == 2
+    assert stats["invalid"] == 1
+
+    cur = con.cursor()
+    rows = cur.execute("SELECT text, output, saved FROM translations ORDER BY text").fetchall()
+    assert rows == [("Пока", "Bye", 1), ("Привет", "Hello", 0)]
+    assert Data_base.get_translation(cur, ["Старая запись", "ru", "en"]) is None
+    con.close()
+
+
+# Пустой перевод, уже записанный в БД, не считается переводом из кеша
+def test_get_translation_ignores_empty_output(tmp_path):
+    con = make_db(str(tmp_path / "Translator.db"))
+    cur = con.cursor()
+    cur.execute("INSERT INTO translations(text, input_lang, output_lang, output) VALUES('Текст', 'ru', 'en', '')")
+    assert Data_base.get_translation(cur, ["Текст", "ru", "en"]) is None
+    con.close()